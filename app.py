@@ -4,9 +4,15 @@
 数据来源：上海黄金交易所 Au99.99 / 公募基金实时估值
 """
 
-import threading
 from app import create_app
-from app.services.background import background_fetch_loop
+from app.config import SERVER_HOST, SERVER_PORT, SERVER_THREADS
+from app.services.background import start_background_tasks
+
+try:
+    from waitress import serve
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
 
 # 创建 Flask 应用实例
 application = create_app()
@@ -16,12 +22,15 @@ if __name__ == '__main__':
     print("=" * 50)
     print(" 个人投资监控看板")
     print(" 数据来源: 上海黄金交易所 Au99.99")
-    print(" 访问地址: http://localhost:5000")
+    print(f" 访问地址: http://localhost:{SERVER_PORT}")
     print("=" * 50)
 
     # 启动后台抓取线程
-    t = threading.Thread(target=background_fetch_loop, daemon=True)
-    t.start()
+    start_background_tasks()
 
-    # 启动 Flask 应用
-    application.run(host='0.0.0.0', port=5000, debug=True, threaded=True, use_reloader=False)
+    if WAITRESS_AVAILABLE:
+        # 生产级 WSGI 服务器（单进程多线程，兼容 Windows）
+        serve(application, host=SERVER_HOST, port=SERVER_PORT, threads=SERVER_THREADS)
+    else:
+        print("[提示] 未安装 waitress，使用 Flask 开发服务器运行")
+        application.run(host=SERVER_HOST, port=SERVER_PORT, debug=False, threaded=True, use_reloader=False)
@@ -15,6 +15,8 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 # 数据文件路径
 DATA_FILE = os.path.join(DATA_DIR, 'data.json')
+# 金价历史追加文件（JSONL，每行一条记录；旧版本保存在 data.json 的 price_history 字段中）
+PRICE_HISTORY_FILE = os.path.join(DATA_DIR, 'price_history.jsonl')
 # 旧数据文件路径（用于自动迁移）
 OLD_DATA_FILE = os.path.join(BASE_DIR, 'data.json')
 
@@ -55,9 +57,13 @@ DATA_SOURCES = [
     }
 ]
 
+# 数据源未配置 timeout 时的默认超时（秒），与上面各数据源的配置保持一致
+DATA_SOURCE_DEFAULT_TIMEOUT = 3
+
 # ==================== 熔断配置 ====================
 MAX_FAIL_COUNT = 3  # 连续失败多少次触发熔断
 MUTE_DURATION = 60  # 熔断持续时间（秒）
+GOLD_HEDGE_DELAY = 1.0  # 对冲请求间隔（秒）：当前数据源超过该时间未返回时并发请求下一个数据源
 
 # ==================== 缓存配置 ====================
 CACHE_TTL_SECONDS = 60       # 基金数据缓存有效期（秒）
@@ -71,6 +77,8 @@ MAX_FETCH_WORKERS = 10        # 并发获取数据的线程池大小
 MAX_HISTORY_SIZE = 20000  # 存储历史价格数据 (最多保存 20000 条，约 24 小时以上的数据，5秒一条)
 HISTORY_KEEP_HOURS = 24   # 数据清理：保留小时数（注：金价历史已改为按自然日清理，此配置保留供其他用途）
 RECORDS_KEEP_DAYS = 7     # 手动记录保留天数
+MAX_MANUAL_RECORDS = 10000  # 手动记录条数上限，超出后淘汰最旧的记录
+SAVE_DEBOUNCE_SECONDS = 10  # 数据落盘合并窗口（秒），窗口内的多次修改只写一次磁盘
 
 # ==================== 基金持仓缓存配置 ====================
 PORTFOLIO_CACHE_TTL = 86400  # 基金重仓股配置缓存有效期 (24小时)
@@ -82,6 +90,12 @@ HEADERS = {
     "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8"
 }
 
+# HTTP 连接池配置（复用 TCP/TLS 连接，避免每次轮询重新握手）
+HTTP_POOL_CONNECTIONS = 4              # 每个 Session 缓存的主机连接池数量
+HTTP_POOL_MAXSIZE = MAX_FETCH_WORKERS  # 单主机最大连接数（需 ≥ 并发线程数，避免连接池耗尽告警）
+HTTP_MAX_RETRIES = 2                   # 自动重试次数
+HTTP_RETRY_BACKOFF = 0.2               # 重试退避因子（秒）
+
 # ==================== 交易时间配置 ====================
 # 节假日 API 配置（按优先级排序）
 HOLIDAY_API_URLS = [
@@ -100,6 +114,9 @@ HOLIDAY_CACHE_TTL = 86400  # 节假日数据缓存有效期（24小时）
 HOLIDAY_CACHE_DIR = DATA_DIR  # 缓存目录
 MAX_CACHED_YEARS = 3  # 内存中最多缓存3年的数据
 
+# 交易所休市安排中的节假日名称（按时间顺序，供各日历爬虫遍历）
+HOLIDAY_NAMES = ('元旦', '春节', '清明节', '劳动节', '端午节', '中秋节', '国庆节')
+
 # ==================== 交易所交易日历配置 ====================
 EXCHANGE_CALENDAR_URL = "https://www.sse.com.cn/disclosure/dealinstruc/closed/"  # 上交所休市安排页面
 EXCHANGE_CALENDAR_FILE = os.path.join(DATA_DIR, "exchange_calendar.json")  # 缓存文件
@@ -114,3 +131,8 @@ SGE_HOLIDAY_CACHE_TTL = 30 * 24 * 3600  # 30天缓存
 # 采集频率配置
 FETCH_INTERVAL_TRADING = 5       # 交易时间内采集间隔（秒）
 FETCH_INTERVAL_NON_TRADING = 300  # 非交易时间采集间隔（秒）
+
+# ==================== 服务配置 ====================
+SERVER_HOST = '0.0.0.0'  # 监听地址
+SERVER_PORT = 5000       # 监听端口
+SERVER_THREADS = 8       # waitress 工作线程数（单进程多线程，内存状态与后台线程只有一份）
@@ -4,28 +4,44 @@ app.models 包初始化
 """
 
 from app.models.state import (
-    lock,
+    price_lock,
+    settings_lock,
+    funds_lock,
+    holdings_lock,
     price_history,
+    history_json_cache,
     manual_records,
+    records_json_cache,
     alert_settings,
     fund_watchlist,
     fund_portfolios,
     fund_cache,
+    fund_cache_mono,
+    fund_cache_stale,
     fund_holdings,
+    fund_holdings_by_code,
     holdings_cache,
     fund_refreshing,
     holdings_refreshing
 )
 
 __all__ = [
-    'lock',
+    'price_lock',
+    'settings_lock',
+    'funds_lock',
+    'holdings_lock',
     'price_history',
+    'history_json_cache',
     'manual_records',
+    'records_json_cache',
     'alert_settings',
     'fund_watchlist',
     'fund_portfolios',
     'fund_cache',
+    'fund_cache_mono',
+    'fund_cache_stale',
     'fund_holdings',
+    'fund_holdings_by_code',
     'holdings_cache',
     'fund_refreshing',
     'holdings_refreshing'
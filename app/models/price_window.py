@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+金价历史滑动窗口
+在有界 deque 的基础上增量维护价格总和与单调队列，
+使最高价 / 最低价 / 均价查询为 O(1)
+"""
+
+from collections import deque
+from itertools import islice
+
+
+class PriceWindow:
+    """
+    有界价格历史序列，接口与 deque 保持一致（append / popleft / clear / 迭代 / 下标）
+
+    - 每条记录分配一个递增序号，窗口首条记录序号为 _head
+    - _max_dq / _min_dq 保存 (序号, 价格)，分别按价格单调递减 / 递增，
+      队首即为当前窗口的最高价 / 最低价
+    - 记录从左侧移出（maxlen 淘汰或 popleft）时同步弹出单调队列中过期的队首
+    - version 在每次修改时递增，供外部缓存（如 /api/history 的 JSON）判断是否失效
+    - appended 为累计追加条数，只增不减（clear / 淘汰不影响），供增量持久化定位未保存的记录
+
+    记录仍以 dict 形式保存：/api/history 与持久化都直接输出记录本身，
+    统计量已是 O(1)，改用 numpy 列式存储收益有限且会引入额外依赖。
+    """
+
+    def __init__(self, maxlen):
+        self._items = deque(maxlen=maxlen)
+        self._head = 0
+        self._sum = 0.0
+        self._max_dq = deque()
+        self._min_dq = deque()
+        self.version = 0
+        self.appended = 0
+
+    @property
+    def maxlen(self):
+        return self._items.maxlen
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def append(self, item):
+        """追加一条记录，窗口已满时先淘汰最旧的记录"""
+        if len(self._items) == self._items.maxlen:
+            self.popleft()
+
+        price = item['price']
+        seq = self._head + len(self._items)
+        self._items.append(item)
+        self._sum += price
+
+        while self._max_dq and self._max_dq[-1][1] <= price:
+            self._max_dq.pop()
+        self._max_dq.append((seq, price))
+
+        while self._min_dq and self._min_dq[-1][1] >= price:
+            self._min_dq.pop()
+        self._min_dq.append((seq, price))
+        self.version += 1
+        self.appended += 1
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def popleft(self):
+        """移除并返回最旧的记录"""
+        item = self._items.popleft()
+        self._sum -= item['price']
+        if self._max_dq[0][0] == self._head:
+            self._max_dq.popleft()
+        if self._min_dq[0][0] == self._head:
+            self._min_dq.popleft()
+        self._head += 1
+        self.version += 1
+
+        # 窗口清空时归零，避免浮点累加误差残留
+        if not self._items:
+            self._sum = 0.0
+        return item
+
+    def discard_before(self, timestamp):
+        """
+        移除时间戳早于 timestamp 的全部记录，返回移除条数
+        记录按时间顺序追加，二分查找切分点后整体截断，避免逐条比较与 popleft
+        """
+        items = self._items
+        lo, hi = 0, len(items)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if items[mid].get('timestamp', 0) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        if not lo:
+            return 0
+        if lo == len(items):
+            self.clear()
+            return lo
+
+        self._sum -= sum(item['price'] for item in islice(items, lo))
+        self._head += lo
+        while self._max_dq[0][0] < self._head:
+            self._max_dq.popleft()
+        while self._min_dq[0][0] < self._head:
+            self._min_dq.popleft()
+        self._items = deque(islice(items, lo, None), maxlen=items.maxlen)
+        self.version += 1
+        return lo
+
+    def clear(self):
+        self._items.clear()
+        self._max_dq.clear()
+        self._min_dq.clear()
+        self._head = 0
+        self._sum = 0.0
+        self.version += 1
+
+    def stats(self):
+        """
+        返回窗口统计 (最高价, 最低价, 均价, 条数)
+        窗口为空时返回 None
+        """
+        count = len(self._items)
+        if not count:
+            return None
+        return self._max_dq[0][1], self._min_dq[0][1], self._sum / count, count
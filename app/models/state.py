@@ -6,20 +6,39 @@
 
 import threading
 from collections import deque
-from app.config import MAX_HISTORY_SIZE
+
+from app.config import MAX_HISTORY_SIZE, MAX_MANUAL_RECORDS
+from app.models.price_window import PriceWindow
 
 
 # ==================== 线程锁 ====================
-# 使用 RLock 以支持在持有锁的情况下调用其他需要锁的函数
-lock = threading.RLock()
+# 按资源拆分锁，基金接口与金价接口互不阻塞
+# 约定：同一线程同一时刻只持有其中一把锁，且不得在持锁期间调用 save_data()
+# 使用 RLock 以支持在持有锁的情况下调用其他需要同一把锁的函数
+price_lock = threading.RLock()     # price_history
+settings_lock = threading.RLock()  # alert_settings / manual_records / records_json_cache
+funds_lock = threading.RLock()     # fund_watchlist / fund_portfolios / fund_cache(_mono/_stale) / fund_refreshing
+holdings_lock = threading.RLock()  # fund_holdings(_by_code) / holdings_cache / holdings_refreshing
 
 # ==================== 金价历史数据 ====================
-# 存储历史价格数据 (最多保存 MAX_HISTORY_SIZE 条)
-price_history = deque(maxlen=MAX_HISTORY_SIZE)
+# 存储历史价格数据 (最多保存 MAX_HISTORY_SIZE 条)，增量维护最高/最低/均价
+price_history = PriceWindow(MAX_HISTORY_SIZE)
+
+# /api/history 响应体缓存，version 与 price_history.version 一致时可直接复用
+# 结构: { "bytes": bytes | None, "version": int }
+history_json_cache = {
+    "bytes": None,
+    "version": -1
+}
 
 # ==================== 手动记录 ====================
-# 用户手动记录的价格快照
-manual_records = []
+# 用户手动记录的价格快照 (最多保存 MAX_MANUAL_RECORDS 条)
+manual_records = deque(maxlen=MAX_MANUAL_RECORDS)
+
+# /api/records 响应体缓存，修改 manual_records 时需同步置为 None
+records_json_cache = {
+    "bytes": None
+}
 
 # ==================== 预警设置 ====================
 alert_settings = {
@@ -40,10 +59,19 @@ fund_portfolios = {}
 # 基金数据缓存 (内存缓存，不持久化详情，只持久化代码列表)
 fund_cache = {}
 
+# fund_cache 各条目的写入时间 (time.monotonic())，仅用于 TTL 判断，不受系统时间跳变影响
+fund_cache_mono = {}
+
+# fund_cache 条目的"(缓存)"标记副本，快速模式返回过期数据时复用，写入新数据时失效
+fund_cache_stale = {}
+
 # 基金持仓数据 (存储在 data.json 中)
 # 结构: [{code, name, cost_price, shares, note}, ...]
 fund_holdings = []
 
+# 持仓按基金代码索引，与 fund_holdings 共享同一批 dict，增删时需同步维护
+fund_holdings_by_code = {}
+
 # ==================== 持仓数据缓存 ====================
 # 内存缓存，用于加速基金估值页刷新
 holdings_cache = {
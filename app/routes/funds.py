@@ -5,19 +5,23 @@
 """
 
 import time
-from flask import Blueprint, jsonify, request
-from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request
 
-from app.config import (
-    CACHE_TTL_SECONDS, FUND_STALE_TTL_SECONDS, MAX_FETCH_WORKERS
+from app.config import CACHE_TTL_SECONDS, FUND_STALE_TTL_SECONDS
+from app.models.state import (
+    funds_lock, fund_watchlist, fund_cache, fund_cache_mono, fund_cache_stale
 )
-from app.models.state import lock, fund_watchlist, fund_cache
 from app.services.fund_fetcher import (
     fetch_fund_data,
+    fetch_funds_batch,
     fetch_fund_portfolio,
-    refresh_fund_cache_async
+    refresh_fund_cache_async,
+    store_fund_cache,
+    fund_cache_age,
+    get_stale_fund_view
 )
-from app.services.persistence import save_data
+from app.services.persistence import schedule_save
+from app.utils.json_utils import ojsonify
 
 
 funds_bp = Blueprint('funds', __name__)
@@ -29,39 +33,37 @@ def get_funds():
     results = []
 
     fast_mode = request.args.get('fast', '0').lower() in ('1', 'true')
-    current_time = time.time()
-
-    with lock:
-        current_watchlist = list(fund_watchlist)
+    # TTL 判断使用单调时钟，不受系统时间调整影响
+    current_time = time.monotonic()
 
     codes_to_fetch = []
     codes_to_refresh = []
     temp_results = {}
 
-    for code in current_watchlist:
-        cache_item = fund_cache.get(code)
-        if cache_item and (current_time - cache_item['timestamp'] < CACHE_TTL_SECONDS):
-            temp_results[code] = cache_item
-        elif fast_mode and cache_item and (current_time - cache_item['timestamp'] < FUND_STALE_TTL_SECONDS):
-            # 快速模式：优先返回可接受的过期缓存
-            stale_item = dict(cache_item)
-            if "(缓存)" not in stale_item.get('source', ''):
-                stale_item['source'] = f"{stale_item.get('source', '')}(缓存)"
-            temp_results[code] = stale_item
-            codes_to_refresh.append(code)
-        else:
-            codes_to_fetch.append(code)
+    with funds_lock:
+        current_watchlist = list(fund_watchlist)
+
+        for code in current_watchlist:
+            cache_item = fund_cache.get(code)
+            cache_age = fund_cache_age(code, current_time)
+            if cache_item and cache_age < CACHE_TTL_SECONDS:
+                temp_results[code] = cache_item
+            elif fast_mode and cache_item and cache_age < FUND_STALE_TTL_SECONDS:
+                # 快速模式：优先返回可接受的过期缓存（复用带标记的副本）
+                temp_results[code] = get_stale_fund_view(code, cache_item)
+                codes_to_refresh.append(code)
+            else:
+                codes_to_fetch.append(code)
 
     # 非快速模式或无可用缓存时：并发抓取
     if codes_to_fetch:
-        with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
-            fetched_data_list = list(executor.map(fetch_fund_data, codes_to_fetch))
+        fetched_data_list = fetch_funds_batch(codes_to_fetch)
 
-        with lock:
+        with funds_lock:
             for i, data in enumerate(fetched_data_list):
                 code = codes_to_fetch[i]
                 if data:
-                    fund_cache[code] = data
+                    store_fund_cache(code, data)
                     temp_results[code] = data
                 else:
                     old_cache = fund_cache.get(code)
@@ -84,7 +86,7 @@ def get_funds():
 
     results = [temp_results.get(code) for code in current_watchlist if temp_results.get(code)]
 
-    return jsonify({"success": True, "data": results})
+    return ojsonify({"success": True, "data": results})
 
 
 @funds_bp.route('/api/funds/<fund_code>/portfolio')
@@ -93,8 +95,8 @@ def get_fund_portfolio(fund_code):
     force_refresh = request.args.get('refresh', 'false').lower() == 'true'
     data = fetch_fund_portfolio(fund_code, force_refresh=force_refresh)
     if data is not None:
-        return jsonify({"success": True, "data": data})
-    return jsonify({"success": False, "message": "获取持仓失败"})
+        return ojsonify({"success": True, "data": data})
+    return ojsonify({"success": False, "message": "获取持仓失败"})
 
 
 @funds_bp.route('/api/funds/add', methods=['POST'])
@@ -104,35 +106,47 @@ def add_fund():
     code = str(req_data.get('code', '')).strip()
     
     if not code or not code.isdigit() or len(code) != 6:
-        return jsonify({"success": False, "message": "无效的基金代码 (需6位数字)"})
+        return ojsonify({"success": False, "message": "无效的基金代码 (需6位数字)"})
         
-    with lock:
+    with funds_lock:
         if code in fund_watchlist:
-            return jsonify({"success": False, "message": "该基金已在列表中"})
+            return ojsonify({"success": False, "message": "该基金已在列表中"})
+        # 缓存新鲜（如持仓页刚抓取过）时直接复用，免去一次验证请求
+        data = None
+        if fund_cache_age(code, time.monotonic()) < CACHE_TTL_SECONDS:
+            data = fund_cache.get(code)
     
-    # 尝试抓取一次以验证代码有效性
-    data = fetch_fund_data(code)
-    if not data:
-        return jsonify({"success": False, "message": "无法获取该基金数据，请确认代码是否正确"})
+    fetched = not data
+    if fetched:
+        # 缓存不可用时抓取一次以验证代码有效性
+        data = fetch_fund_data(code)
+        if not data:
+            return ojsonify({"success": False, "message": "无法获取该基金数据，请确认代码是否正确"})
         
-    with lock:
+    with funds_lock:
+        # 抓取期间可能有并发请求已添加，需再次确认
+        if code in fund_watchlist:
+            return ojsonify({"success": False, "message": "该基金已在列表中"})
         fund_watchlist.append(code)
-        fund_cache[code] = data # 顺便存入缓存
+        if fetched:
+            # 仅新抓取的数据写入缓存；复用的缓存保持原写入时间，不能借此续期
+            store_fund_cache(code, data)
         
-    save_data()
-    return jsonify({"success": True, "data": data})
+    schedule_save()
+    return ojsonify({"success": True, "data": data})
 
 
 @funds_bp.route('/api/funds/<code_to_del>', methods=['DELETE'])
 def delete_fund(code_to_del):
     """删除自选基金"""
-    with lock:
-        if code_to_del in fund_watchlist:
-            fund_watchlist.remove(code_to_del)
-            # 缓存可以选择不删，反正会自动过期，或者删掉省内存
-            if code_to_del in fund_cache:
-                del fund_cache[code_to_del]
-            save_data()
-            return jsonify({"success": True})
-            
-    return jsonify({"success": False, "message": "未找到该基金"})
+    with funds_lock:
+        if code_to_del not in fund_watchlist:
+            return ojsonify({"success": False, "message": "未找到该基金"})
+        fund_watchlist.remove(code_to_del)
+        # 缓存可以选择不删，反正会自动过期，或者删掉省内存
+        fund_cache.pop(code_to_del, None)
+        fund_cache_mono.pop(code_to_del, None)
+        fund_cache_stale.pop(code_to_del, None)
+
+    schedule_save()
+    return ojsonify({"success": True})
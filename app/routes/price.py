@@ -5,17 +5,19 @@
 """
 
 import time
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, Response, render_template, request
 
 from app.config import STALE_THRESHOLD_SECONDS
-from app.models.state import lock, price_history
+from app.models.state import price_lock, price_history, history_json_cache
 from app.services.gold_fetcher import fetch_gold_price
 from app.services.calculator import (
     calculate_target_prices,
     calculate_current_profit,
     get_24h_summary
 )
-from app.services.persistence import save_data
+from app.services.persistence import schedule_save
+from app.utils.json_utils import dumps_bytes, ojsonify
+from app.utils.http_cache import etag_matches, with_etag, not_modified
 
 
 price_bp = Blueprint('price', __name__)
@@ -30,43 +32,65 @@ def index():
 @price_bp.route('/api/price')
 def get_price():
     """获取当前金价 (改为从缓存获取，不再实时去抓取，提高响应速度)"""
-    with lock:
-        if price_history:
-            latest = price_history[-1].copy() # 复制一份，避免直接修改缓存
-            # 如果缓存数据太老（超过 30 秒），说明后台可能挂了或未运行，尝试实时抓一次
-            if time.time() - latest["timestamp"] > STALE_THRESHOLD_SECONDS:
-                data, _ = fetch_gold_price()
-                if data:
-                    price_history.append(data)
-                    save_data()
-                    latest = data
-            
-            # 注入 24 小时摘要信息
-            summary = get_24h_summary()
-            if summary:
-                latest.update(summary)
-                
-            return jsonify({"success": True, "data": latest})
-        else:
-            # 没历史记录时去抓一次
-            data, error_msg = fetch_gold_price()
-            if data:
-                with lock:
-                    price_history.append(data)
-                save_data()
-                return jsonify({"success": True, "data": data})
-            else:
-                return jsonify({"success": False, "message": error_msg or "无法初始化基础数据"})
-            
-    return jsonify({"success": False, "message": "系统错误，无法读取历史记录"})
+    with price_lock:
+        # 复制一份，避免直接修改缓存
+        latest = price_history[-1].copy() if price_history else None
+
+    if latest is None:
+        # 没历史记录时去抓一次
+        data, error_msg = fetch_gold_price()
+        if data:
+            with price_lock:
+                price_history.append(data)
+            schedule_save(meta=False)
+            return ojsonify({"success": True, "data": data})
+        return ojsonify({"success": False, "message": error_msg or "无法初始化基础数据"})
+
+    # 如果缓存数据太老（超过 30 秒），说明后台可能挂了或未运行，尝试实时抓一次
+    # 抓取与保存均在锁外进行，避免网络请求阻塞其他读取历史数据的请求
+    if time.time() - latest["timestamp"] > STALE_THRESHOLD_SECONDS:
+        data, _ = fetch_gold_price()
+        if data:
+            with price_lock:
+                price_history.append(data)
+            schedule_save(meta=False)
+            latest = data.copy()
+
+    # 注入 24 小时摘要信息
+    summary = get_24h_summary()
+    if summary:
+        latest.update(summary)
+
+    return ojsonify({"success": True, "data": latest})
 
 
 @price_bp.route('/api/history')
 def get_history():
-    """获取历史价格数据"""
-    with lock:
-        history_list = list(price_history)
-    return jsonify({"success": True, "data": history_list})
+    """获取历史价格数据（响应体按 price_history.version 缓存，未变化时直接复用）"""
+    with price_lock:
+        # 弱 ETag：条数 + 最新一条的时间戳，跨进程重启依然稳定
+        if price_history:
+            etag = f'{len(price_history)}-{price_history[-1].get("timestamp", 0)}'
+        else:
+            etag = '0'
+        version = price_history.version
+        body = history_json_cache["bytes"]
+        if history_json_cache["version"] != version:
+            body = None
+            history_list = list(price_history)
+
+    if etag_matches(etag):
+        return not_modified(etag)
+
+    if body is None:
+        # 编码在锁外进行，避免阻塞后台写入
+        body = dumps_bytes({"success": True, "data": history_list})
+        with price_lock:
+            if price_history.version == version:
+                history_json_cache["bytes"] = body
+                history_json_cache["version"] = version
+
+    return with_etag(Response(body, mimetype='application/json'), etag)
 
 
 @price_bp.route('/api/calculate', methods=['POST'])
@@ -77,12 +101,12 @@ def calculate():
     current_price = req_data.get('current_price', 0)
     
     if buy_price <= 0:
-        return jsonify({"success": False, "message": "买入价格必须大于0"})
+        return ojsonify({"success": False, "message": "买入价格必须大于0"})
     
     targets = calculate_target_prices(buy_price)
     current_profit = calculate_current_profit(buy_price, current_price)
     
-    return jsonify({
+    return ojsonify({
         "success": True,
         "targets": targets,
         "current_profit": current_profit
@@ -4,11 +4,13 @@
 包含预警设置、手动记录等
 """
 
-from flask import Blueprint, jsonify, request
-from datetime import datetime
+import time
+from flask import Blueprint, Response, request
 
-from app.models.state import lock, alert_settings, manual_records
-from app.services.persistence import save_data
+from app.models.state import settings_lock, alert_settings, manual_records, records_json_cache
+from app.services.persistence import schedule_save
+from app.utils.json_utils import dumps_bytes, ojsonify
+from app.utils.time_utils import format_ymd_hms
 
 
 settings_bp = Blueprint('settings', __name__)
@@ -19,49 +21,55 @@ def handle_settings():
     """获取或更新预警设置"""
     if request.method == 'POST':
         req_data = request.get_json()
-        with lock:
+        with settings_lock:
             alert_settings["high"] = float(req_data.get('high', 0))
             alert_settings["low"] = float(req_data.get('low', 0))
             alert_settings["enabled"] = bool(req_data.get('enabled', False))
             alert_settings["trading_events_enabled"] = bool(req_data.get('trading_events_enabled', True))
-        save_data()
-        return jsonify({"success": True, "settings": alert_settings})
+        schedule_save()
+        return ojsonify({"success": True, "settings": alert_settings})
     
-    return jsonify({"success": True, "settings": alert_settings})
+    return ojsonify({"success": True, "settings": alert_settings})
 
 
 @settings_bp.route('/api/record', methods=['POST'])
 def add_record():
     """添加手动记录"""
     req_data = request.get_json()
+    now_ts = time.time()
     record = {
         "price": req_data.get('price'),
         "buy_price": req_data.get('buy_price'),
         "profit": req_data.get('profit'),
-        "timestamp": datetime.now().timestamp(),
-        "time_str": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "timestamp": now_ts,
+        "time_str": format_ymd_hms(time.localtime(now_ts)),
         "note": req_data.get('note', '')
     }
     
-    with lock:
+    with settings_lock:
         manual_records.append(record)
+        records_json_cache["bytes"] = None
     
-    save_data()
-    return jsonify({"success": True, "record": record})
+    schedule_save()
+    return ojsonify({"success": True, "record": record})
 
 
 @settings_bp.route('/api/records')
 def get_records():
-    """获取所有手动记录"""
-    with lock:
-        records = list(manual_records)
-    return jsonify({"success": True, "data": records})
+    """获取所有手动记录（响应体缓存至下次修改）"""
+    with settings_lock:
+        body = records_json_cache["bytes"]
+        if body is None:
+            body = dumps_bytes({"success": True, "data": list(manual_records)})
+            records_json_cache["bytes"] = body
+    return Response(body, mimetype='application/json')
 
 
 @settings_bp.route('/api/records/clear', methods=['POST'])
 def clear_records():
     """清空手动记录"""
-    with lock:
+    with settings_lock:
         manual_records.clear()
-    save_data()
-    return jsonify({"success": True})
+        records_json_cache["bytes"] = None
+    schedule_save()
+    return ojsonify({"success": True})
@@ -4,8 +4,9 @@
 提供交易时间状态查询接口
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, request
 from app.services.trading_hours import get_trading_status, get_fund_trading_status
+from app.utils.json_utils import ojsonify
 
 
 trading_bp = Blueprint('trading', __name__)
@@ -69,12 +70,12 @@ def get_trading_status_api():
         else:
             status = get_trading_status()
         
-        return jsonify({
+        return ojsonify({
             "success": True,
             "data": _format_status(status)
         })
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             "success": False,
             "message": f"获取交易状态失败: {str(e)}"
         })
@@ -3,10 +3,14 @@
 app.services 包初始化
 """
 
-from app.services.gold_fetcher import fetch_gold_price
+from app.services.gold_fetcher import fetch_gold_price, refresh_enabled_sources
 from app.services.fund_fetcher import (
     fetch_fund_data,
+    fetch_funds_batch,
     fetch_fund_portfolio,
+    store_fund_cache,
+    fund_cache_age,
+    get_stale_fund_view,
     refresh_fund_cache_async,
     refresh_holdings_cache_async,
     build_holdings_response
@@ -16,13 +20,18 @@ from app.services.calculator import (
     calculate_current_profit,
     get_24h_summary
 )
-from app.services.persistence import save_data, load_data
-from app.services.background import background_fetch_loop
+from app.services.persistence import save_data, load_data, schedule_save
+from app.services.background import background_fetch_loop, start_background_tasks
 
 __all__ = [
     'fetch_gold_price',
+    'refresh_enabled_sources',
     'fetch_fund_data',
+    'fetch_funds_batch',
     'fetch_fund_portfolio',
+    'store_fund_cache',
+    'fund_cache_age',
+    'get_stale_fund_view',
     'refresh_fund_cache_async',
     'refresh_holdings_cache_async',
     'build_holdings_response',
@@ -30,6 +39,8 @@ __all__ = [
     'calculate_current_profit',
     'get_24h_summary',
     'save_data',
+    'schedule_save',
     'load_data',
-    'background_fetch_loop'
+    'background_fetch_loop',
+    'start_background_tasks'
 ]
@@ -5,13 +5,29 @@
 """
 
 import time
+import threading
 
-from app.models.state import lock, price_history
+from app.models.state import price_lock, price_history
 from app.services.gold_fetcher import fetch_gold_price
-from app.services.persistence import save_data
+from app.services.persistence import schedule_save
 from app.services.trading_hours import get_fetch_interval, check_trading_events
 
 
+# 防止后台任务被重复启动（如 app.py 与 wsgi.py 同时被导入）
+_start_lock = threading.Lock()
+_started = False
+
+
+def start_background_tasks():
+    """启动后台采集线程（进程内只启动一次）"""
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        threading.Thread(target=background_fetch_loop, name='gold-fetch', daemon=True).start()
+        _started = True
+
+
 def background_fetch_loop():
     """后台持续采集任务线程，负责金价和基金数据的定时更新"""
     print("后台抓取线程启动...")
@@ -40,11 +56,11 @@ def background_fetch_loop():
             # 获取金价数据
             data, _ = fetch_gold_price()
             if data:
-                with lock:
+                with price_lock:
                     # 添加到历史记录
                     price_history.append(data)
-                # 记录成功后保存数据（内部包含清理逻辑）
-                save_data()
+                # 标记待保存，由落盘线程合并写入（内部包含清理逻辑）
+                schedule_save(meta=False)
             
             # 按计算出的间隔休眠
             time.sleep(interval)
@@ -4,10 +4,32 @@
 包含盈利计算、收益率计算、24小时统计等
 """
 
-from app.models.state import lock, price_history
+from functools import lru_cache
 
+from app.models.state import price_lock, price_history
 
-def calculate_target_prices(buy_price, fee_rate=0.005):
+
+DEFAULT_FEE_RATE = 0.005               # 默认卖出手续费率 (0.5%)
+TARGET_PERCENTS = (5, 10, 15, 20, 30)  # 盈利目标百分比
+
+# 默认费率下卖出到手比例 (1 - 手续费率)
+_NET_FACTOR = 1 - DEFAULT_FEE_RATE
+
+
+def _build_target_multipliers(fee_rate):
+    """预计算各盈利目标的 (目标百分比, 利润率, 1 + 利润率, 卖出价倍数)"""
+    return tuple(
+        (target, target / 100, 1 + target / 100, round((1 + target / 100) / (1 - fee_rate), 4))
+        for target in TARGET_PERCENTS
+    )
+
+
+# 默认费率下的倍数在模块加载时计算一次
+_TARGET_MULTIPLIERS = _build_target_multipliers(DEFAULT_FEE_RATE)
+
+
+@lru_cache(maxsize=256)
+def calculate_target_prices(buy_price, fee_rate=DEFAULT_FEE_RATE):
     """
     计算多个盈利目标的卖出价格
     
@@ -18,26 +40,26 @@ def calculate_target_prices(buy_price, fee_rate=0.005):
         fee_rate: 卖出手续费率 (默认 0.5%)
     
     返回:
-        多个盈利目标对应的卖出价格列表
+        多个盈利目标对应的卖出价格列表（结果被缓存共享，调用方不应修改）
     """
-    targets = [5, 10, 15, 20, 30]  # 盈利目标百分比
-    results = []
-    
-    for target in targets:
-        profit_rate = target / 100
-        # 目标卖出价 = 买入价 × (1 + 利润率) / (1 - 手续费率)
-        sell_price = buy_price * (1 + profit_rate) / (1 - fee_rate)
-        results.append({
+    if fee_rate == DEFAULT_FEE_RATE:
+        multipliers = _TARGET_MULTIPLIERS
+    else:
+        multipliers = _build_target_multipliers(fee_rate)
+
+    net_rate = _NET_FACTOR if fee_rate == DEFAULT_FEE_RATE else 1 - fee_rate
+    return [
+        {
             "target_percent": target,
-            "sell_price": round(sell_price, 2),
+            "sell_price": round(buy_price * growth / net_rate, 2),
             "profit_amount": round(buy_price * profit_rate, 2),
-            "actual_multiplier": round(sell_price / buy_price, 4)
-        })
-    
-    return results
+            "actual_multiplier": multiplier
+        }
+        for target, profit_rate, growth, multiplier in multipliers
+    ]
 
 
-def calculate_current_profit(buy_price, current_price, fee_rate=0.005):
+def calculate_current_profit(buy_price, current_price, fee_rate=DEFAULT_FEE_RATE):
     """
     计算当前价格卖出后的实际收益率 (扣除手续费)
     
@@ -46,27 +68,25 @@ def calculate_current_profit(buy_price, current_price, fee_rate=0.005):
     if buy_price <= 0:
         return 0
     
-    actual_receive = current_price * (1 - fee_rate)
+    net_factor = _NET_FACTOR if fee_rate == DEFAULT_FEE_RATE else 1 - fee_rate
+    actual_receive = current_price * net_factor
     profit_rate = (actual_receive - buy_price) / buy_price * 100
     return round(profit_rate, 2)
 
 
 def get_24h_summary():
     """计算过去 24 小时的统计数据"""
-    with lock:
-        if not price_history:
-            return None
-        
-        prices = [p['price'] for p in price_history]
-        high = max(prices)
-        low = min(prices)
-        avg = sum(prices) / len(prices)
-        volatility = high - low
-        
-        return {
-            "high_24h": round(high, 2),
-            "low_24h": round(low, 2),
-            "avg_24h": round(avg, 2),
-            "volatility": round(volatility, 2),
-            "count": len(prices)
-        }
+    with price_lock:
+        stats = price_history.stats()
+    if not stats:
+        return None
+
+    # 最高/最低/均价由 PriceWindow 增量维护，无需遍历历史
+    high, low, avg, count = stats
+    return {
+        "high_24h": round(high, 2),
+        "low_24h": round(low, 2),
+        "avg_24h": round(avg, 2),
+        "volatility": round(high - low, 2),
+        "count": count
+    }
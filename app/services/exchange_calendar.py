@@ -8,8 +8,9 @@ import json
 import os
 from datetime import datetime
 
-from app.config import SGE_HOLIDAY_CACHE_FILE
+from app.config import SGE_HOLIDAY_CACHE_FILE, HOLIDAY_NAMES
 from app.services.sge_holiday_crawler import fetch_sge_holiday_data
+from app.utils.holiday_index import DateNameIndex
 
 
 # 内置2026年休市数据（来自上交所官网）
@@ -37,25 +38,46 @@ BUILTIN_EXCHANGE_HOLIDAYS = {
     }
 }
 
+# 内置数据的查询索引，模块加载时构建一次
+# 年份 -> 休市日期集合
+_BUILTIN_HOLIDAY_SETS = {
+    year: frozenset().union(*data["holidays"].values())
+    for year, data in BUILTIN_EXCHANGE_HOLIDAYS.items()
+}
+# 日期 -> 节日名称
+_BUILTIN_DATE_TO_NAME = {
+    date: name
+    for data in BUILTIN_EXCHANGE_HOLIDAYS.values()
+    for name, dates in data["holidays"].items()
+    for date in dates
+}
+
 
 class ExchangeCalendarService:
     """交易所交易日历服务"""
     
     def __init__(self):
         self.cache_file = SGE_HOLIDAY_CACHE_FILE
+        # 已解析的缓存文件内容，按文件修改时间判断是否需要重新读取
+        self._cache_mem = None
+        self._cache_mtime = None
+        # 爬虫 / 缓存数据的日期 -> 节日名称索引，数据对象不变时直接复用
+        self._name_index = DateNameIndex()
         self._ensure_cache_dir()
     
     def _ensure_cache_dir(self):
-        cache_dir = os.path.dirname(self.cache_file)
-        if not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
     
     def _load_cache(self):
-        if not os.path.exists(self.cache_file):
-            return None
         try:
+            # stat 同时用于判断文件是否存在，不再单独调用 os.path.exists
+            mtime = os.stat(self.cache_file).st_mtime_ns
+            if mtime == self._cache_mtime:
+                return self._cache_mem
             with open(self.cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                self._cache_mem = json.load(f)
+            self._cache_mtime = mtime
+            return self._cache_mem
         except:
             return None
     
@@ -65,8 +87,12 @@ class ExchangeCalendarService:
             with open(temp_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
             os.replace(temp_file, self.cache_file)
+            self._cache_mem = data
+            self._cache_mtime = os.stat(self.cache_file).st_mtime_ns
             return True
         except:
+            # 写入失败时内存内容可能已被修改，下次从磁盘重新读取
+            self._cache_mtime = None
             return False
     
     def get_holidays(self, year=None):
@@ -74,13 +100,9 @@ class ExchangeCalendarService:
         if year is None:
             year = datetime.now().year
         
-        # 1. 优先使用内置数据
-        if year in BUILTIN_EXCHANGE_HOLIDAYS:
-            data = BUILTIN_EXCHANGE_HOLIDAYS[year]
-            all_dates = set()
-            for dates in data.get("holidays", {}).values():
-                all_dates.update(dates)
-            return all_dates
+        # 1. 优先使用内置数据（只读集合，调用方仅做成员判断）
+        if year in _BUILTIN_HOLIDAY_SETS:
+            return _BUILTIN_HOLIDAY_SETS[year]
         
         # 2. 尝试使用SGE爬虫获取
         try:
@@ -135,23 +157,22 @@ class ExchangeCalendarService:
     
     def get_holiday_name_by_date(self, date_str):
         """根据日期获取节日名称"""
-        date = datetime.strptime(date_str, "%Y-%m-%d")
-        year = date.year
+        # 只需要年份，直接截取 "YYYY-MM-DD" 的前 4 位
+        year = int(date_str[:4])
         
         # 1. 内置数据
         if year in BUILTIN_EXCHANGE_HOLIDAYS:
-            holidays = BUILTIN_EXCHANGE_HOLIDAYS[year].get("holidays", {})
-            for name, dates in holidays.items():
-                if date_str in dates:
-                    return name
+            name = _BUILTIN_DATE_TO_NAME.get(date_str)
+            if name:
+                return name
         
         # 2. SGE爬虫数据
         try:
             sge_data = fetch_sge_holiday_data(year)
             if sge_data:
-                for name, dates in sge_data.get("holidays", {}).items():
-                    if date_str in dates:
-                        return name
+                name = self._name_index.lookup(("sge", year), sge_data.get("holidays", {}), date_str)
+                if name:
+                    return name
         except Exception:
             pass
 
@@ -161,9 +182,7 @@ class ExchangeCalendarService:
             calendars = cache.get("calendars", {})
             if str(year) in calendars:
                 holidays = calendars[str(year)].get("holidays", {})
-                for name, dates in holidays.items():
-                    if date_str in dates:
-                        return name
+                return self._name_index.lookup(("cache", year), holidays, date_str)
 
         return None
 
@@ -206,13 +225,13 @@ if __name__ == "__main__":
     print(sorted(holidays))
     
     print(f"\n首个交易日:")
-    for name in ["元旦", "春节", "清明节", "劳动节", "端午节", "中秋节", "国庆节"]:
+    for name in HOLIDAY_NAMES:
         day = service.get_first_trading_day(name, 2026)
         print(f"  {name}: {day}")
     
     # 测试日期查询
     print(f"\n日期对应的节日:")
-    test_dates = ["2026-02-16", "2026-02-20", "2026-02-24", "2026-10-01"]
+    test_dates = ("2026-02-16", "2026-02-20", "2026-02-24", "2026-10-01")
     for d in test_dates:
         name = service.get_holiday_name_by_date(d)
         print(f"  {d}: {name}")
@@ -7,13 +7,28 @@
 import re
 import json
 import os
-import requests
 from datetime import datetime, timedelta
 
 from app.config import (
     EXCHANGE_CALENDAR_URL,
-    EXCHANGE_CALENDAR_FILE
+    EXCHANGE_CALENDAR_FILE,
+    HOLIDAY_NAMES
 )
+from app.services.http_client import create_session, decode_html
+from app.utils.holiday_index import DateNameIndex
+
+
+# 预编译正则，避免每次解析时重复查找正则缓存
+# 日期范围：X月X日（星期X）至X月X日（星期X），兼容“第二段省略月份”：如“2月15日至23日”
+_DATE_RANGE_RE = re.compile(
+    r'(\d{1,2})\s*月\s*(\d{1,2})\s*日[^\d]*?(?:至|到|-|—|~)[^\d]*?(?:(\d{1,2})\s*月)?\s*(\d{1,2})\s*日'
+)
+# 单日休市：X月X日休市
+_SINGLE_DAY_RE = re.compile(r'(\d{1,2})\s*月\s*(\d{1,2})\s*日(?:（[^）]+）)?\s*休市')
+# 首个交易日：X月X日（星期X）起照常开市
+_FIRST_TRADING_RE = re.compile(r'(\d{1,2})\s*月\s*(\d{1,2})\s*日[^\d]*?起(?:照常|恢复)?开市')
+# 正文兜底：X月X日...至...X月X日...休市
+_FALLBACK_RANGE_RE = re.compile(r'(\d{1,2})月(\d{1,2})日[^\d至]*至[^\d]*(?:(\d{1,2})月)?(\d{1,2})日[^\d]*休市')
 
 
 class ExchangeCalendarCrawler:
@@ -23,14 +38,18 @@ class ExchangeCalendarCrawler:
         self.url = EXCHANGE_CALENDAR_URL
         self.base_url = "https://www.sse.com.cn/"
         self.cache_file = EXCHANGE_CALENDAR_FILE
-        self._session = requests.Session()
+        # 已解析的缓存文件内容，按文件修改时间判断是否需要重新读取
+        self._cache_mem = None
+        self._cache_mtime = None
+        # 日期 -> 节日名称索引，缓存数据对象不变时直接复用
+        self._name_index = DateNameIndex()
+        # 带连接池的 Session，预热请求与正式请求复用同一连接
+        self._session = create_session(pool_connections=1, pool_maxsize=1)
         self._ensure_cache_dir()
     
     def _ensure_cache_dir(self):
         """确保缓存目录存在"""
-        cache_dir = os.path.dirname(self.cache_file)
-        if not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
             
     def _warm_up(self):
         """访问首页建立 Session/Cookies"""
@@ -45,12 +64,17 @@ class ExchangeCalendarCrawler:
     
     def _load_cache(self):
         """从文件加载缓存"""
-        if not os.path.exists(self.cache_file):
-            return None
-        
         try:
+            # stat 同时用于判断文件是否存在，不再单独调用 os.path.exists
+            mtime = os.stat(self.cache_file).st_mtime_ns
+            if mtime == self._cache_mtime:
+                return self._cache_mem
             with open(self.cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                self._cache_mem = json.load(f)
+            self._cache_mtime = mtime
+            return self._cache_mem
+        except FileNotFoundError:
+            return None
         except Exception as e:
             print(f"[交易所日历] 加载缓存失败: {e}")
             return None
@@ -62,9 +86,13 @@ class ExchangeCalendarCrawler:
             with open(temp_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
             os.replace(temp_file, self.cache_file)
+            self._cache_mem = data
+            self._cache_mtime = os.stat(self.cache_file).st_mtime_ns
             return True
         except Exception as e:
             print(f"[交易所日历] 保存缓存失败: {e}")
+            # 写入失败时内存内容可能已被修改，下次从磁盘重新读取
+            self._cache_mtime = None
             return False
     
     def _fetch_page(self):
@@ -81,15 +109,8 @@ class ExchangeCalendarCrawler:
             }
             response = self._session.get(self.url, headers=headers, timeout=10)
             
-            # 优先尝试 utf-8，然后尝试 gbk
-            content = response.content
-            try:
-                text = content.decode('utf-8')
-            except UnicodeDecodeError:
-                try:
-                    text = content.decode('gbk')
-                except UnicodeDecodeError:
-                    text = response.text
+            # 按页面声明的编码解码，未声明时依次尝试 utf-8、gbk
+            text = decode_html(response)
             
             if len(text) < 1000:
                 print(f"[交易所日历] 页面内容异常短 (长度: {len(text)})，可能被拦截")
@@ -105,9 +126,7 @@ class ExchangeCalendarCrawler:
         dates = []
         
         # 匹配格式：X月X日（星期X）至X月X日（星期X）
-        # 兼容“第二段省略月份”：如“2月15日至23日”
-        pattern = r'(\d{1,2})\s*月\s*(\d{1,2})\s*日[^\d]*?(?:至|到|-|—|~)[^\d]*?(?:(\d{1,2})\s*月)?\s*(\d{1,2})\s*日'
-        match = re.search(pattern, text)
+        match = _DATE_RANGE_RE.search(text)
         
         if match:
             start_month = int(match.group(1))
@@ -127,8 +146,7 @@ class ExchangeCalendarCrawler:
                 print(f"[交易所日历] 日期解析错误: {e}")
         else:
             # 尝试匹配单日休市：X月X日休市
-            single_pattern = r'(\d{1,2})\s*月\s*(\d{1,2})\s*日(?:（[^）]+）)?\s*休市'
-            single_match = re.search(single_pattern, text)
+            single_match = _SINGLE_DAY_RE.search(text)
             if single_match:
                 sm, sd = int(single_match.group(1)), int(single_match.group(2))
                 try:
@@ -141,8 +159,7 @@ class ExchangeCalendarCrawler:
     def _find_first_trading_day(self, text, year=2026):
         """从文本中找到首个交易日"""
         # 匹配格式：X月X日（星期X）起照常开市
-        pattern = r'(\d{1,2})\s*月\s*(\d{1,2})\s*日[^\d]*?起(?:照常|恢复)?开市'
-        match = re.search(pattern, text)
+        match = _FIRST_TRADING_RE.search(text)
         
         if match:
             month = int(match.group(1))
@@ -162,7 +179,6 @@ class ExchangeCalendarCrawler:
         
         # 匹配所有包含日期范围的行
         # 格式：X月X日（周X）至X月X日（周X）休市，X月X日（周X）起照常开市
-        holiday_names = ['元旦', '春节', '清明节', '劳动节', '端午节', '中秋节', '国庆节']
         
         try:
             from bs4 import BeautifulSoup
@@ -175,7 +191,7 @@ class ExchangeCalendarCrawler:
                     td1_text = cells[0].get_text(strip=True)
                     td2_text = cells[1].get_text(strip=True)
                     
-                    for name in holiday_names:
+                    for name in HOLIDAY_NAMES:
                         # 兼容部分乱码情况，如果在原始 td 的 html 里能找到名字也可以
                         if name in td1_text or name in str(cells[0]):
                             # 找到了休市安排说明单元格 td2_text
@@ -195,8 +211,7 @@ class ExchangeCalendarCrawler:
             # 备用方案（如果基于表格解析失败，或者上交所更换了格式，回退到无标签的正文暴搜）
             if not holidays:
                 clean_text = soup.get_text()
-                pattern = r'(\d{1,2})月(\d{1,2})日[^\d至]*至[^\d]*(?:(\d{1,2})月)?(\d{1,2})日[^\d]*休市'
-                for match in re.finditer(pattern, clean_text):
+                for match in _FALLBACK_RANGE_RE.finditer(clean_text):
                     try:
                         start_month = int(match.group(1))
                         start_day = int(match.group(2))
@@ -318,16 +333,13 @@ class ExchangeCalendarCrawler:
         """获取指定日期所在的节假日名称"""
         if year is None:
             try:
-                year = int(date_str.split('-')[0])
+                year = int(date_str[:4])
             except:
                 year = datetime.now().year
         
         data = self.crawl_year(year)
         if data:
-            holidays = data.get("holidays", {})
-            for name, dates in holidays.items():
-                if date_str in dates:
-                    return name
+            return self._name_index.lookup(year, data.get("holidays", {}), date_str)
         return None
 # 全局爬虫实例
 _crawler = None
@@ -6,10 +6,8 @@
 
 import re
 import time
-import json
-import requests
+import atexit
 import threading
-from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
 from app.config import (
@@ -18,10 +16,26 @@ from app.config import (
     MAX_FETCH_WORKERS, PORTFOLIO_CACHE_TTL
 )
 from app.models.state import (
-    lock, fund_cache, fund_portfolios, holdings_cache
+    funds_lock, holdings_lock, fund_cache, fund_cache_mono, fund_cache_stale,
+    fund_portfolios, holdings_cache
 )
 import app.models.state as state
-from app.services.persistence import save_data
+from app.services.http_client import create_session
+from app.services.persistence import schedule_save
+from app.utils.json_utils import loads
+from app.utils.time_utils import format_ymd, format_ymd_hms
+
+
+# 共享连接池（线程安全），供线程池中的并发抓取复用连接
+SESSION = create_session()
+
+# 预编译正则：天天基金 jsonpgz(...); 包装（直接匹配原始 bytes），新浪引号内载荷
+_JSONPGZ_RE = re.compile(rb'jsonpgz\((.*)\);')
+_QUOTED_PAYLOAD_RE = re.compile(r'"([^"]+)"')
+
+# 常驻线程池，避免每次请求重复创建/销毁线程
+_FETCH_POOL = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix='fund-fetch')
+atexit.register(_FETCH_POOL.shutdown, wait=False)
 
 
 def fetch_fund_from_eastmoney(fund_code):
@@ -36,13 +50,12 @@ def fetch_fund_from_eastmoney(fund_code):
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Referer": "http://fund.eastmoney.com/"
         }
-        response = requests.get(url, headers=headers, timeout=3)
-        text = response.text
+        response = SESSION.get(url, headers=headers, timeout=3)
         
-        # 提取 jsonpgz(...) 中的 JSON 内容
-        match = re.search(r'jsonpgz\((.*)\);', text)
+        # 提取 jsonpgz(...) 中的 JSON 内容（在 bytes 上匹配并解析，无需先解码为 str）
+        match = _JSONPGZ_RE.search(response.content)
         if match:
-            data = json.loads(match.group(1))
+            data = loads(match.group(1))
             return {
                 "code": data['fundcode'],
                 "name": data['name'],
@@ -50,7 +63,7 @@ def fetch_fund_from_eastmoney(fund_code):
                 "dwjz": float(data['dwjz']) if data.get('dwjz') and str(data['dwjz']).strip() else 0,      # 昨日单位净值
                 "change": float(data['gszzl']),   # 估算涨跌幅 (%)
                 "time_str": data['gztime'],       # 估值时间
-                "timestamp": datetime.now().timestamp(),
+                "timestamp": time.time(),
                 "source": "天天基金"
             }
     except Exception as e:
@@ -70,28 +83,29 @@ def fetch_fund_from_sina(fund_code):
             "Referer": "https://finance.sina.com.cn",
             "User-Agent": "Mozilla/5.0"
         }
-        response = requests.get(url, headers=headers, timeout=3)
+        response = SESSION.get(url, headers=headers, timeout=3)
         # 尝试检测编码
         encoding = 'gbk'
         if 'charset' in response.headers.get('Content-Type', ''):
              encoding = response.headers.get('Content-Type', '').split('charset=')[-1]
-        response.encoding = encoding
         
-        text = response.text
-        match = re.search(r'"([^"]+)"', text)
+        # 按已知编码直接解码，跳过 response.text 的编码探测
+        text = response.content.decode(encoding, errors='replace')
+        match = _QUOTED_PAYLOAD_RE.search(text)
         if match:
             parts = match.group(1).split(',')
             if len(parts) > 1:
                 # 新浪接口返回: 名称,净值,累计净值,日期
                 current_price = float(parts[1]) if parts[1] else 0
+                now_ts = time.time()
                 return {
                     "code": fund_code,
                     "name": parts[0],
                     "price": current_price,
                     "dwjz": current_price,  # 新浪接口无昨日净值，使用当前净值作为近似
                     "change": 0,  # 新浪此接口可能无实时估值涨幅
-                    "time_str": parts[3] if len(parts) > 3 else datetime.now().strftime("%Y-%m-%d"),
-                    "timestamp": datetime.now().timestamp(),
+                    "time_str": parts[3] if len(parts) > 3 else format_ymd(time.localtime(now_ts)),
+                    "timestamp": now_ts,
                     "source": "新浪财经(仅净值)"
                 }
     except Exception as e:
@@ -114,26 +128,64 @@ def fetch_fund_data(fund_code):
     return None
 
 
+def fetch_funds_batch(codes):
+    """
+    并发获取多只基金数据
+    返回与 codes 一一对应的结果列表，获取失败的位置为 None
+    """
+    if not codes:
+        return []
+    # 单只基金直接抓取，省去线程池调度
+    if len(codes) == 1:
+        return [fetch_fund_data(codes[0])]
+    return list(_FETCH_POOL.map(fetch_fund_data, codes))
+
+
+def store_fund_cache(code, data):
+    """写入基金缓存并记录单调时钟写入时间（调用方需持有 funds_lock）"""
+    fund_cache[code] = data
+    fund_cache_mono[code] = time.monotonic()
+    fund_cache_stale.pop(code, None)
+
+
+def get_stale_fund_view(code, cache_item):
+    """
+    返回带"(缓存)"来源标记的缓存副本（调用方需持有 funds_lock）
+    副本按条目复用，直到该基金写入新数据
+    """
+    stale_item = fund_cache_stale.get(code)
+    if stale_item is None:
+        stale_item = dict(cache_item)
+        if "(缓存)" not in stale_item.get('source', ''):
+            stale_item['source'] = f"{stale_item.get('source', '')}(缓存)"
+        fund_cache_stale[code] = stale_item
+    return stale_item
+
+
+def fund_cache_age(code, now):
+    """基金缓存条目的存活秒数，无缓存时返回无穷大"""
+    return now - fund_cache_mono.get(code, float('-inf'))
+
+
 def refresh_fund_cache_async(codes):
     """后台刷新基金缓存，避免阻塞接口"""
     if not codes:
         return
     
-    with lock:
+    with funds_lock:
         if state.fund_refreshing:
             return
         state.fund_refreshing = True
 
     def _worker():
         try:
-            with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
-                fetched_list = list(executor.map(fetch_fund_data, codes))
-            with lock:
+            fetched_list = fetch_funds_batch(codes)
+            with funds_lock:
                 for i, data in enumerate(fetched_list):
                     if data:
-                        fund_cache[codes[i]] = data
+                        store_fund_cache(codes[i], data)
         finally:
-            with lock:
+            with funds_lock:
                 state.fund_refreshing = False
 
     threading.Thread(target=_worker, daemon=True).start()
@@ -228,7 +280,7 @@ def build_holdings_response(holdings, fund_data_list, cached_map):
     
     # 如果没有找到任何有效的基金更新时间，则使用系统当前时间
     if not latest_update_time:
-        latest_update_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        latest_update_time = format_ymd_hms(time.localtime())
 
     return {
         "success": True,
@@ -250,7 +302,7 @@ def refresh_holdings_cache_async(holdings):
     if not holdings:
         return
     
-    with lock:
+    with holdings_lock:
         if state.holdings_refreshing:
             return
         state.holdings_refreshing = True
@@ -258,21 +310,20 @@ def refresh_holdings_cache_async(holdings):
     def _worker():
         try:
             codes = [h['code'] for h in holdings]
-            with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
-                fund_data_list = list(executor.map(fetch_fund_data, codes))
+            fund_data_list = fetch_funds_batch(codes)
 
-            with lock:
+            with funds_lock:
                 cached_map = {code: fund_cache.get(code) for code in codes}
                 for i, data in enumerate(fund_data_list):
                     if data:
-                        fund_cache[codes[i]] = data
+                        store_fund_cache(codes[i], data)
 
             response = build_holdings_response(holdings, fund_data_list, cached_map)
-            with lock:
-                holdings_cache["timestamp"] = time.time()
+            with holdings_lock:
+                holdings_cache["timestamp"] = time.monotonic()
                 holdings_cache["response"] = response
         finally:
-            with lock:
+            with holdings_lock:
                 state.holdings_refreshing = False
 
     threading.Thread(target=_worker, daemon=True).start()
@@ -338,7 +389,7 @@ def fetch_fund_portfolio_fallback(fund_code):
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             "Referer": "http://fund.eastmoney.com/"
         }
-        response = requests.get(url, headers=headers, timeout=5)
+        response = SESSION.get(url, headers=headers, timeout=5)
         text = response.text
         
         match = re.search(r'stockCodes=\[(.*?)\]', text)
@@ -385,7 +436,7 @@ def fetch_fund_portfolio_fallback(fund_code):
         list_str = ",".join(sina_codes)
         hq_url = f"http://hq.sinajs.cn/list={list_str}"
         
-        hq_res = requests.get(hq_url, headers={"Referer": "https://finance.sina.com.cn"}, timeout=5)
+        hq_res = SESSION.get(hq_url, headers={"Referer": "https://finance.sina.com.cn"}, timeout=5)
         hq_res.encoding = 'gbk'
         hq_text = hq_res.text
         
@@ -447,7 +498,7 @@ def fetch_fund_portfolio(fund_code, force_refresh=False):
     4. 计算每只股票对基金净值的贡献
     """
     try:
-        now_ts = datetime.now().timestamp()
+        now_ts = time.time()
         holdings_info = {}
         report_period = ""
         use_cache = False
@@ -455,7 +506,7 @@ def fetch_fund_portfolio(fund_code, force_refresh=False):
         stale_cache_item = None
         # 1. 尝试从持久化缓存获取构成 (有效期 24 小时)
         if not force_refresh:
-            with lock:
+            with funds_lock:
                 if fund_code in fund_portfolios:
                     cache_item = fund_portfolios[fund_code]
                     stale_cache_item = cache_item
@@ -471,7 +522,7 @@ def fetch_fund_portfolio(fund_code, force_refresh=False):
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
                 "Referer": "http://fundf10.eastmoney.com/"
             }
-            response = requests.get(url, headers=headers, timeout=8)
+            response = SESSION.get(url, headers=headers, timeout=8)
             if response.status_code != 200:
                 return {
                     "holdings": [],
@@ -542,14 +593,14 @@ def fetch_fund_portfolio(fund_code, force_refresh=False):
             
             if holdings_info:
                 # 更新持久化缓存
-                with lock:
+                with funds_lock:
                     fund_portfolios[fund_code] = {
                         "timestamp": now_ts,
                         "report_period": report_period,
                         "holdings_info": holdings_info
                     }
                 # 抓取到新数据后保存到磁盘
-                threading.Thread(target=save_data, daemon=True).start()
+                schedule_save()
 
         if not holdings_info:
             return {
@@ -590,7 +641,7 @@ def fetch_fund_portfolio(fund_code, force_refresh=False):
         list_str = ",".join(sina_codes)
         hq_url = f"http://hq.sinajs.cn/list={list_str}"
         
-        hq_res = requests.get(hq_url, headers={"Referer": "https://finance.sina.com.cn"}, timeout=5)
+        hq_res = SESSION.get(hq_url, headers={"Referer": "https://finance.sina.com.cn"}, timeout=5)
         encoding = 'gbk'
         if 'charset' in hq_res.headers.get('Content-Type', ''):
             encoding = hq_res.headers.get('Content-Type', '').split('charset=')[-1]
@@ -5,24 +5,67 @@
 """
 
 import re
+import math
 import time
-import json
-import requests
-from datetime import datetime
+import atexit
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from app.config import (
-    DATA_SOURCES, HEADERS, MAX_FAIL_COUNT, MUTE_DURATION
+    DATA_SOURCES, DATA_SOURCE_DEFAULT_TIMEOUT, HEADERS, MAX_FAIL_COUNT, MUTE_DURATION,
+    GOLD_HEDGE_DELAY
 )
+from app.services.http_client import create_session
+from app.utils.json_utils import loads
+from app.utils.time_utils import format_hms
 
 
-def fetch_from_eastmoney(source_config):
+# 共享连接池，后台轮询复用 keep-alive 连接
+# 默认请求头只设置一次；不做自动重试，失败由对冲请求直接切换到备用数据源
+SESSION = create_session(max_retries=0, headers=HEADERS)
+
+# 预编译正则：腾讯全版行情返回 v_xxx="...";，引号内为波浪线分隔的字段
+# 按位置直接捕获 [3]现价 [4]昨收 [5]今开 [31]涨跌 [32]涨跌幅 [33]最高 [34]最低，无需整体 split
+_TENCENT_FULL_RE = re.compile(
+    r'"(?:[^~"]*~){3}([^~"]+)~([^~"]+)~([^~"]+)~(?:[^~"]*~){25}([^~"]+)~([^~"]+)~([^~"]+)~([^~"]+)~'
+)
+_JSONP_PAYLOAD_RE = re.compile(rb'\((.*)\)', re.DOTALL)
+
+
+def _r2(x, _m=100.0):
+    """保留两位小数（四舍五入），比内置 round(x, 2) 少一次十进制转换"""
+    if not math.isfinite(x):
+        # NaN / inf 无法转为 int，交给 round 原样返回，与原先行为一致
+        return round(x, 2)
+    return int(x * _m + (0.5 if x >= 0 else -0.5)) / _m
+
+
+def _build_quote(source_config, current_price, open_price, high_price, low_price,
+                 yesterday_close, change, change_percent):
+    """组装统一格式的金价数据，各数据源解析完成后调用"""
+    now_ts = time.time()
+    return {
+        "price": _r2(current_price),
+        "open": _r2(open_price),
+        "high": _r2(high_price),
+        "low": _r2(low_price),
+        "yesterday_close": _r2(yesterday_close),
+        "change": _r2(change),
+        "change_percent": _r2(change_percent),
+        "timestamp": now_ts,
+        "time_str": format_hms(time.localtime(now_ts)),
+        "source": source_config['name']
+    }
+
+
+def fetch_from_eastmoney(source_config, timeout):
     """
     从东方财富获取 Au99.99 实时价格
     """
     try:
         url = "https://push2.eastmoney.com/api/qt/stock/get?secid=118.AU9999&fields=f43,f44,f45,f46,f60,f170"
-        response = requests.get(url, headers=HEADERS, timeout=source_config.get('timeout', 5))
-        data = response.json()
+        response = SESSION.get(url, timeout=timeout)
+        # 直接解析原始 bytes，跳过 requests 的编码探测与 str 解码
+        data = loads(response.content)
         
         if data.get('data'):
             d = data['data']
@@ -40,26 +83,14 @@ def fetch_from_eastmoney(source_config):
             
             change = current_price - yesterday_close
             
-            now = datetime.now()
-            
-            return {
-                "price": round(current_price, 2),
-                "open": round(open_price, 2),
-                "high": round(high_price, 2),
-                "low": round(low_price, 2),
-                "yesterday_close": round(yesterday_close, 2),
-                "change": round(change, 2),
-                "change_percent": round(change_percent, 2),
-                "timestamp": now.timestamp(),
-                "time_str": now.strftime("%H:%M:%S"),
-                "source": source_config['name']
-            }
+            return _build_quote(source_config, current_price, open_price, high_price, low_price,
+                                yesterday_close, change, change_percent)
     except Exception as e:
         print(f"[{source_config['name']}] 获取失败: {e}")
     return None
 
 
-def fetch_from_sina(source_config):
+def fetch_from_sina(source_config, timeout):
     """
     从新浪财经获取 Au99.99 实时价格
     """
@@ -69,23 +100,18 @@ def fetch_from_sina(source_config):
             "Referer": "https://finance.sina.com.cn",
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         }
-        response = requests.get(url, headers=headers, timeout=source_config.get('timeout', 5))
+        response = SESSION.get(url, headers=headers, timeout=timeout)
         
-        # 处理编码
-        content_type = response.headers.get('Content-Type', '').lower()
-        if 'charset' in content_type:
-             response.encoding = content_type.split('charset=')[-1]
-        else:
-             response.encoding = 'gbk' # 默认GBK
-
-        text = response.text
-        
-        match = re.search(r'"([^"]+)"', text)
-        if not match:
+        # 固定格式 var hq_str_gds_au9999="名称,现价,昨收,今开,最高,最低,...";
+        # 所需字段均为 ASCII 数字，直接在 bytes 上按首尾引号切片，无需解码整个 GBK 响应
+        raw = response.content
+        start = raw.find(b'"')
+        end = raw.rfind(b'"')
+        if start < 0 or end <= start:
             return None
         
-        data_str = match.group(1)
-        parts = data_str.split(',')
+        # 只切分出前 7 个字段，其余部分保留为一段
+        parts = raw[start + 1:end].split(b',', 7)
         
         if len(parts) < 8:
             return None
@@ -103,99 +129,52 @@ def fetch_from_sina(source_config):
         change = current_price - yesterday_close
         change_percent = (change / yesterday_close * 100) if yesterday_close else 0
         
-        now = datetime.now()
-        
-        return {
-            "price": round(current_price, 2),
-            "open": round(open_price, 2),
-            "high": round(high_price, 2),
-            "low": round(low_price, 2),
-            "yesterday_close": round(yesterday_close, 2),
-            "change": round(change, 2),
-            "change_percent": round(change_percent, 2),
-            "timestamp": now.timestamp(),
-            "time_str": now.strftime("%H:%M:%S"),
-            "source": source_config['name']
-        }
+        return _build_quote(source_config, current_price, open_price, high_price, low_price,
+                            yesterday_close, change, change_percent)
     except Exception as e:
         print(f"[{source_config['name']}] 获取失败: {e}")
     return None
 
 
-def fetch_from_tencent(source_config):
+def fetch_from_tencent(source_config, timeout):
     """
     从腾讯财经获取 Au99.99 实时价格
     """
     try:
-        url = "http://qt.gtimg.cn/q=s_shau9999"
-        response = requests.get(url, headers=HEADERS, timeout=source_config.get('timeout', 3))
-        text = response.text
+        # 全版行情已包含现价、涨跌与最高最低，只请求一次
+        url = "http://qt.gtimg.cn/q=shau9999"
+        response = SESSION.get(url, timeout=timeout)
         
-        # 格式: v_s_shau9999="1~黄金Au9999~shau9999~550.45~0.12~0.02~...~";
-        match = re.search(r'"([^"]+)"', text)
+        # 格式: v_shau9999="1~黄金Au9999~shau9999~现价~昨收~今开~...~涨跌~涨跌幅~最高~最低~...";
+        match = _TENCENT_FULL_RE.search(response.text)
         if not match:
             return None
-            
-        parts = match.group(1).split('~')
-        if len(parts) < 6:
-            return None
-            
-        current_price = float(parts[3])
-        change = float(parts[4])
-        change_percent = float(parts[5])
         
-        # 腾讯简版不含最高最低，尝试使用全版以获取更全数据
-        full_url = "http://qt.gtimg.cn/q=shau9999"
-        full_res = requests.get(full_url, headers=HEADERS, timeout=2)
-        full_match = re.search(r'"([^"]+)"', full_res.text)
-        
-        open_price = current_price
-        high_price = current_price
-        low_price = current_price
-        yesterday_close = current_price - change
-        
-        if full_match:
-            f_parts = full_match.group(1).split('~')
-            if len(f_parts) > 34:
-                yesterday_close = float(f_parts[4])
-                open_price = float(f_parts[5])
-                high_price = float(f_parts[33])
-                low_price = float(f_parts[34])
-
-        now = datetime.now()
-        return {
-            "price": round(current_price, 2),
-            "open": round(open_price, 2),
-            "high": round(high_price, 2),
-            "low": round(low_price, 2),
-            "yesterday_close": round(yesterday_close, 2),
-            "change": round(change, 2),
-            "change_percent": round(change_percent, 2),
-            "timestamp": now.timestamp(),
-            "time_str": now.strftime("%H:%M:%S"),
-            "source": source_config['name']
-        }
+        (current_price, yesterday_close, open_price,
+         change, change_percent, high_price, low_price) = map(float, match.groups())
+
+        return _build_quote(source_config, current_price, open_price, high_price, low_price,
+                            yesterday_close, change, change_percent)
     except Exception as e:
         print(f"[{source_config['name']}] 获取失败: {e}")
     return None
 
 
-def fetch_from_netease(source_config):
+def fetch_from_netease(source_config, timeout):
     """
     从网易财经获取 Au99.99 实时价格
     """
     try:
         # 网易接口，118AU9999 是 SGE Au99.99 的代码
         url = "http://api.money.126.net/data/feed/118AU9999,money.api"
-        response = requests.get(url, headers=HEADERS, timeout=source_config.get('timeout', 3))
+        response = SESSION.get(url, timeout=timeout)
         
-        # 网易返回的是 _ntes_quote_callback({...});
-        text = response.text
-        match = re.search(r'\((.*)\)', text)
+        # 网易返回的是 _ntes_quote_callback({...});，直接在 bytes 上截取并解析
+        match = _JSONP_PAYLOAD_RE.search(response.content)
         if not match:
             return None
             
-        data = json.loads(match.group(1))
+        data = loads(match.group(1))
         d = data.get('118AU9999')
         if not d:
             return None
@@ -211,19 +190,8 @@ def fetch_from_netease(source_config):
         change = d.get('updown', 0)
         change_percent = d.get('percent', 0) * 100
         
-        now = datetime.now()
-        return {
-            "price": round(current_price, 2),
-            "open": round(open_price, 2),
-            "high": round(high_price, 2),
-            "low": round(low_price, 2),
-            "yesterday_close": round(yesterday_close, 2),
-            "change": round(change, 2),
-            "change_percent": round(change_percent, 2),
-            "timestamp": now.timestamp(),
-            "time_str": now.strftime("%H:%M:%S"),
-            "source": source_config['name']
-        }
+        return _build_quote(source_config, current_price, open_price, high_price, low_price,
+                            yesterday_close, change, change_percent)
     except Exception as e:
         print(f"[{source_config['name']}] 获取失败: {e}")
     return None
@@ -237,48 +205,125 @@ SOURCE_HANDLERS = {
     "netease": fetch_from_netease
 }
 
+def _build_enabled_sources():
+    """将 DATA_SOURCES 中启用的数据源解析为 (配置, 处理函数, 超时) 元组，保持优先级顺序"""
+    return tuple(
+        (source, SOURCE_HANDLERS[source['type']], source.get('timeout', DATA_SOURCE_DEFAULT_TIMEOUT))
+        for source in DATA_SOURCES
+        if source.get('enabled', False) and source.get('type') in SOURCE_HANDLERS
+    )
+
+
+# 启用的数据源在模块加载时预先解析，避免每轮采集重复过滤与查表
+# 配置 dict 为 DATA_SOURCES 中的同一对象，熔断状态仍直接记录在其上
+_ENABLED_SOURCES = _build_enabled_sources()
+
+
+def refresh_enabled_sources():
+    """
+    运行时修改 DATA_SOURCES 的 enabled / type / timeout 后调用，重新生成启用列表
+    整体替换元组引用，进行中的 fetch_gold_price 继续使用旧列表
+    """
+    global _ENABLED_SOURCES
+    _ENABLED_SOURCES = _build_enabled_sources()
+    return len(_ENABLED_SOURCES)
+
+
+# 对冲请求线程池（常驻），按处理函数数量分配，重新启用数据源后也不会排队
+_HEDGE_POOL = ThreadPoolExecutor(
+    max_workers=len(SOURCE_HANDLERS), thread_name_prefix='gold-fetch'
+)
+atexit.register(_HEDGE_POOL.shutdown, wait=False)
+
+
+def _record_success(source):
+    """成功获取，重置失败计数"""
+    source['fail_count'] = 0
+    source['mute_until'] = 0
+
+
+def _record_failure(source):
+    """失败处理：增加计数并检查是否触发熔断"""
+    source['fail_count'] = source.get('fail_count', 0) + 1
+    if source['fail_count'] >= MAX_FAIL_COUNT:
+        print(f"!!! [熔断] {source['name']} 连续失败 {MAX_FAIL_COUNT} 次，进入 {MUTE_DURATION}s 冷却期")
+        source['mute_until'] = time.monotonic() + MUTE_DURATION
+        source['fail_count'] = 0 # 触发后重置，等待冷却后重新开始
+
+
+def _record_late_result(source, future):
+    """已有其他数据源胜出后才完成的请求：仍按结果计入成功 / 失败，慢数据源才能触发熔断"""
+    if future.cancelled():
+        return
+    if future.result():
+        _record_success(source)
+    else:
+        _record_failure(source)
+
+
+def _run_handler(handler, source, timeout):
+    """在线程池中执行数据源处理函数，异常视为失败"""
+    try:
+        return handler(source, timeout)
+    except Exception as e:
+        print(f"[{source['name']}] 获取失败: {e}")
+        return None
+
 
 def fetch_gold_price():
     """
-    从配置的数据源列表中循环获取价格，包含熔断机制
+    按优先级对冲请求各数据源获取价格，包含熔断机制
+    
+    先请求优先级最高的数据源；若 GOLD_HEDGE_DELAY 秒内未返回或已失败，
+    再并发请求下一个数据源。返回最先成功的结果（同时完成时取优先级高者），
+    慢数据源不再阻塞后续备用源。
     
     返回:
         (data, error_msg): 成功时 data 为价格数据字典，error_msg 为 None
                           失败时 data 为 None，error_msg 为错误信息
     """
-    now_ts = time.time()
-    enabled_sources = [s for s in DATA_SOURCES if s.get('enabled', False)]
+    # 熔断计时使用单调时钟，不受系统时间调整影响
+    now_ts = time.monotonic()
+    enabled_sources = _ENABLED_SOURCES
     
     if not enabled_sources:
         return None, "没有启用的数据源"
         
-    muted_count = 0
-    for source in enabled_sources:
-        # 检查是否处于熔断期
-        if source.get('mute_until', 0) > now_ts:
-            muted_count += 1
-            continue
-            
-        handler = SOURCE_HANDLERS.get(source['type'])
-        if not handler:
-            continue
-            
-        # 尝试获取数据
-        data = handler(source)
-        if data:
-            # 成功获取，重置失败计数
-            source['fail_count'] = 0
-            source['mute_until'] = 0
-            return data, None
-        else:
-            # 失败处理：增加计数并检查是否触发熔断
-            source['fail_count'] = source.get('fail_count', 0) + 1
-            if source['fail_count'] >= MAX_FAIL_COUNT:
-                print(f"!!! [熔断] {source['name']} 连续失败 {MAX_FAIL_COUNT} 次，进入 {MUTE_DURATION}s 冷却期")
-                source['mute_until'] = now_ts + MUTE_DURATION
-                source['fail_count'] = 0 # 触发后重置，等待冷却后重新开始
-            
-    if muted_count == len(enabled_sources):
+    # 跳过处于熔断期的数据源，保留优先级顺序
+    candidates = [
+        (priority, source, handler, timeout)
+        for priority, (source, handler, timeout) in enumerate(enabled_sources)
+        if source.get('mute_until', 0) <= now_ts
+    ]
+    if not candidates:
         return None, "所有数据源均处于熔断冷却期，请稍后再试"
-        
+
+    pending = {}
+    next_index = 0
+    while pending or next_index < len(candidates):
+        # 启动下一个数据源：首次进入、上一轮超时未返回、或已完成的请求全部失败
+        if next_index < len(candidates):
+            priority, source, handler, timeout = candidates[next_index]
+            future = _HEDGE_POOL.submit(_run_handler, handler, source, timeout)
+            pending[future] = (priority, source)
+            next_index += 1
+
+        # 还有备用源时最多等待 GOLD_HEDGE_DELAY，否则等到剩余请求结束（由各自的超时兜底）
+        wait_timeout = GOLD_HEDGE_DELAY if next_index < len(candidates) else None
+        done, _ = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+        for future in sorted(done, key=lambda f: pending[f][0]):
+            _, source = pending.pop(future)
+            data = future.result()
+            if data:
+                _record_success(source)
+                # 取消尚未开始的请求；已在执行的请求结果不再使用，但完成后仍记录成败
+                for other, (_, other_source) in pending.items():
+                    if not other.cancel():
+                        other.add_done_callback(
+                            lambda f, s=other_source: _record_late_result(s, f)
+                        )
+                return data, None
+            _record_failure(source)
+
     return None, "所有可用数据源均获取失败，请检查网络或稍后重试"
@@ -8,7 +8,7 @@ import time
 import json
 import os
 import threading
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from collections import OrderedDict
 
 from app.config import (
@@ -17,6 +17,8 @@ from app.config import (
     HOLIDAY_CACHE_DIR,
     MAX_CACHED_YEARS
 )
+from app.services.http_client import create_session
+from app.utils.time_utils import format_date
 from app.utils.lunar_holiday_calculator import (
     get_holidays_as_set,
     calculate_all_legal_holidays,
@@ -51,9 +53,6 @@ class HolidayCacheManager:
     
     def _load_from_disk(self):
         """从磁盘加载缓存"""
-        if not os.path.exists(self._cache_file):
-            return
-        
         try:
             with open(self._cache_file, 'r', encoding='utf-8') as f:
                 disk_cache = json.load(f)
@@ -71,6 +70,8 @@ class HolidayCacheManager:
             
             print(f"[节假日缓存] 从磁盘加载了 {len(self._memory_cache)} 年的数据")
             
+        except FileNotFoundError:
+            return
         except Exception as e:
             print(f"[节假日缓存] 加载失败: {e}")
     
@@ -90,9 +91,11 @@ class HolidayCacheManager:
                 # 读取现有数据，合并内存缓存
                 disk_data = {"metadata": {"version": "2.0"}, "cache": {}}
                 
-                if os.path.exists(self._cache_file):
+                try:
                     with open(self._cache_file, 'r', encoding='utf-8') as f:
                         disk_data = json.load(f)
+                except FileNotFoundError:
+                    pass
                 
                 # 更新缓存
                 for year, data in self._memory_cache.items():
@@ -157,6 +160,17 @@ def get_cache_manager():
     return _cache_manager
 
 
+_api_session = None
+
+
+def _get_api_session():
+    """节假日 API 共用的连接池 Session（首次使用时创建）"""
+    global _api_session
+    if _api_session is None:
+        _api_session = create_session()
+    return _api_session
+
+
 def fetch_holidays_from_api(year):
     """
     从多个API获取节假日数据
@@ -170,8 +184,7 @@ def fetch_holidays_from_api(year):
     for api_name, api_url in HOLIDAY_API_URLS:
         try:
             url = api_url.format(year=year)
-            import requests
-            response = requests.get(url, timeout=5)
+            response = _get_api_session().get(url, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -221,7 +234,8 @@ def calculate_holidays(year):
     
     返回: (holidays_set, source)
     """
-    holidays = get_holidays_as_set(year)
+    # 计算结果为按年缓存的 frozenset，复制一份以免后续修改影响缓存
+    holidays = set(get_holidays_as_set(year))
     source = "calculated"
     
     if holidays:
@@ -269,7 +283,8 @@ def get_holidays(year=None):
             source_name = api_source  # 记录实际来源
             # 应用调休
             if adjustments:
-                holidays = apply_adjustments(holidays, adjustments)
+                # apply_adjustments 返回 frozenset，转回 set 保持返回类型一致
+                holidays = set(apply_adjustments(holidays, adjustments))
         else:
             # 2.2 自动计算
             holidays, calc_source = calculate_holidays(year)
@@ -287,9 +302,8 @@ def get_holidays(year=None):
             holidays = set()
             for d in prev_holidays:
                 try:
-                    old_date = datetime.strptime(d, "%Y-%m-%d")
-                    new_date = old_date.replace(year=year)
-                    holidays.add(new_date.strftime("%Y-%m-%d"))
+                    new_date = date.fromisoformat(d).replace(year=year)
+                    holidays.add(format_date(new_date))
                 except:
                     pass
             source = "fallback"
@@ -334,7 +348,7 @@ def is_holiday(dt=None, market_type="fund"):
     if dt is None:
         dt = datetime.now()
     
-    date_str = dt.strftime("%Y-%m-%d")
+    date_str = format_date(dt)
     
     if market_type == "fund":
         # 基金/股票使用上交所日历爬虫
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 客户端模块
+提供带连接池（keep-alive）的 requests.Session，供各抓取服务复用
+"""
+
+import re
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import (
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE,
+    HTTP_MAX_RETRIES, HTTP_RETRY_BACKOFF
+)
+
+# 页面编码声明：Content-Type 头或 <meta charset> 中的 charset
+_CHARSET_RE = re.compile(rb'charset\s*=\s*["\']?([\w-]+)', re.IGNORECASE)
+
+
+def create_session(pool_connections=HTTP_POOL_CONNECTIONS,
+                   pool_maxsize=HTTP_POOL_MAXSIZE,
+                   max_retries=HTTP_MAX_RETRIES,
+                   headers=None):
+    """
+    创建复用连接的 Session
+    
+    Session 可在线程池中共享；pool_maxsize 需不小于并发线程数，
+    否则多余的连接用完即丢弃，无法复用。
+    headers 作为默认请求头设置一次，单次请求传入的 headers 会与之合并。
+    """
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    if max_retries:
+        retries = Retry(total=max_retries, backoff_factor=HTTP_RETRY_BACKOFF)
+    else:
+        retries = 0
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retries
+    )
+    # 数据源同时存在 http 与 https 接口，两者都需要挂载连接池
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def decode_html(response):
+    """
+    解码 HTML 页面
+    先按声明的编码（响应头，其次页面前 1KB 的 meta）解码一次；
+    未声明或声明有误时依次尝试 utf-8、gbk，最后交给 requests 自行推断
+    """
+    content = response.content
+    charset_m = (_CHARSET_RE.search(response.headers.get('Content-Type', '').encode('latin-1'))
+                 or _CHARSET_RE.search(content[:1024]))
+    if charset_m:
+        try:
+            return content.decode(charset_m.group(1).decode('ascii'))
+        except (LookupError, UnicodeDecodeError):
+            pass
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            return content.decode('gbk')
+        except UnicodeDecodeError:
+            return response.text
@@ -5,77 +5,220 @@
 """
 
 import os
-import json
+import time
+import atexit
 import shutil
-from datetime import datetime
+import threading
 
 from app.config import (
-    DATA_FILE, OLD_DATA_FILE, DATA_DIR,
-    RECORDS_KEEP_DAYS
+    DATA_FILE, OLD_DATA_FILE, DATA_DIR, PRICE_HISTORY_FILE,
+    RECORDS_KEEP_DAYS, SAVE_DEBOUNCE_SECONDS, MAX_HISTORY_SIZE
 )
+from app.utils.json_utils import dumps_bytes, loads
 from app.models.state import (
-    lock, price_history, manual_records, alert_settings,
-    fund_watchlist, fund_holdings, fund_portfolios
+    price_lock, settings_lock, funds_lock, holdings_lock,
+    price_history, manual_records, records_json_cache, alert_settings,
+    fund_watchlist, fund_holdings, fund_holdings_by_code, fund_portfolios
 )
 
+# 串行化写文件，防止多个 save_data 同时写同一个临时文件
+_save_lock = threading.Lock()
+
+# 延迟保存：schedule_save() 只标记脏数据，由后台线程合并后统一落盘
+_dirty = threading.Event()
+_flusher_lock = threading.Lock()
+_flusher_started = False
+
+# 除金价历史外的数据（data.json）是否有修改，只有为 True 时才重写 data.json
+_meta_dirty = True
+
+# 金价历史追加文件的写入状态（均在 _save_lock 内读写）
+# _history_saved_count: 已写入文件时 price_history.appended 的值，之后追加的记录只需追加写入
+# _history_day_start: 文件内容对应的自然日零点，跨日后整体重写一次以丢弃旧数据
+# _history_file_lines: 文件当前行数，超过上限时整体重写，避免 maxlen 淘汰后文件无限增长
+_history_saved_count = 0
+_history_day_start = None
+_history_file_lines = 0
+
+# 历史文件是否已成功整体重写过；此前 data.json 继续保留旧版 price_history 字段，
+# 避免升级后首次写历史文件失败时丢掉磁盘上唯一一份历史
+_history_migrated = False
+
 
 def _get_today_start_timestamp():
     """获取当天自然日零点的时间戳（本地时区）"""
-    now = datetime.now()
-    today_start = datetime(now.year, now.month, now.day, 0, 0, 0)
-    return today_start.timestamp()
+    lt = time.localtime()
+    return time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday, 0, 0, 0, 0, 0, -1))
 
 
 def cleanup_expired_data():
     """清理过期的数据，保持文件精简"""
-    # 注意：此函数必须在锁保护下调用，以避免与状态修改的竞态
+    # 各资源在各自的锁内清理，调用方不应持有任何状态锁
     
     # 1. 清理历史价格（仅保留当天自然日内的数据）
     # 计算今日零点时间戳
     today_start_ts = _get_today_start_timestamp()
-    # 因为 price_history 是有序的，我们可以直接根据时间戳过滤
-    while price_history and price_history[0].get('timestamp', 0) < today_start_ts:
-        price_history.popleft()
+    with price_lock:
+        # 因为 price_history 按时间有序，二分查找切分点后一次性截断
+        price_history.discard_before(today_start_ts)
         
     # 2. 清理手动记录 (7天)
-    now_ts = datetime.now().timestamp()
+    now_ts = time.time()
     record_threshold = now_ts - (RECORDS_KEEP_DAYS * 86400)
-    # 使用原地切片赋值，避免破坏与 state.manual_records 的共享引用
-    manual_records[:] = [r for r in manual_records if r.get('timestamp', 0) > record_threshold]
+    with settings_lock:
+        # 记录按添加时间顺序追加，过期记录都在左端，逐条弹出即可，无需重建整个序列
+        removed = False
+        while manual_records and manual_records[0].get('timestamp', 0) <= record_threshold:
+            manual_records.popleft()
+            removed = True
+        if removed:
+            records_json_cache["bytes"] = None
+        return removed
+
+
+def _write_atomic(path, payload):
+    """原子写入文件（.tmp + fsync + os.replace）"""
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())  # 确保数据写入物理磁盘
+    os.replace(tmp_file, path)
+
+
+def _save_price_history(today_start_ts):
+    """
+    增量保存金价历史：平时只把上次保存之后的新记录追加到 JSONL 文件，
+    跨日或文件行数超过上限时才整体重写
+    """
+    global _history_saved_count, _history_day_start, _history_file_lines, _history_migrated
+    
+    rewrite = (_history_day_start != today_start_ts
+               or _history_file_lines >= MAX_HISTORY_SIZE * 2)
+    
+    with price_lock:
+        appended = price_history.appended
+        if rewrite:
+            records = list(price_history)
+        else:
+            # 按累计追加条数定位尚未写入的尾部记录，不依赖时间戳（同一时间戳或乱序的采样也不会漏写）
+            size = len(price_history)
+            new_count = min(appended - _history_saved_count, size)
+            records = [price_history[i] for i in range(size - new_count, size)]
+    
+    if not rewrite and not records:
+        return
+    
+    payload = b''.join(dumps_bytes(r) + b'\n' for r in records)
+    if rewrite:
+        _write_atomic(PRICE_HISTORY_FILE, payload)
+        _history_migrated = True
+        _history_day_start = today_start_ts
+        _history_file_lines = len(records)
+    else:
+        # 追加写入不做 fsync：异常断电最多丢失最近几条采样，加载时会跳过不完整的末行
+        with open(PRICE_HISTORY_FILE, 'ab') as f:
+            f.write(payload)
+        _history_file_lines += len(records)
+    _history_saved_count = appended
 
 
 def save_data():
-    """将数据保存到 JSON 文件 (原子写入模式)"""
-    with lock:
+    """
+    保存数据 (原子写入模式)
+    金价历史增量追加到 PRICE_HISTORY_FILE，其余数据仅在有修改时重写 DATA_FILE
+    """
+    global _meta_dirty, _history_day_start
+    with _save_lock:
         try:
             # 确保数据目录存在
             os.makedirs(DATA_DIR, exist_ok=True)
             
-            # 在保存前执行清理
-            cleanup_expired_data()
+            # 在保存前执行清理（手动记录过期也属于 data.json 的修改）
+            if cleanup_expired_data():
+                _meta_dirty = True
+            
+            migrated = _history_migrated
+            _save_price_history(_get_today_start_timestamp())
+            if not migrated and _history_migrated:
+                # 历史文件首次写入成功，重写 data.json 去掉旧版 price_history 字段
+                _meta_dirty = True
+        except Exception as e:
+            print(f"保存金价历史失败: {e}")
+            # 状态未知，下次整体重写
+            _history_day_start = None
+        
+        if not _meta_dirty:
+            return
+        # 先清除标记再拍快照，快照期间的新修改会在下一轮保存
+        _meta_dirty = False
+        try:
+            # 逐个资源在各自的锁内拍快照，序列化与写盘在锁外进行
+            with settings_lock:
+                records_snapshot = list(manual_records)
+                alerts_snapshot = dict(alert_settings)
+            with funds_lock:
+                watchlist_snapshot = list(fund_watchlist)
+                portfolios_snapshot = dict(fund_portfolios)
+            with holdings_lock:
+                holdings_snapshot = [dict(h) for h in fund_holdings]
             
             data = {
-                "manual_records": manual_records,
-                "price_history": list(price_history),
-                "alert_settings": alert_settings,
-                "fund_watchlist": fund_watchlist,
-                "fund_holdings": fund_holdings,
-                "fund_portfolios": fund_portfolios
+                "manual_records": records_snapshot,
+                "alert_settings": alerts_snapshot,
+                "fund_watchlist": watchlist_snapshot,
+                "fund_holdings": holdings_snapshot,
+                "fund_portfolios": portfolios_snapshot
             }
+            if not _history_migrated:
+                # 历史文件尚未成功写入，继续在 data.json 中保留一份
+                with price_lock:
+                    data["price_history"] = list(price_history)
             
-            # 使用临时文件进行原子写入
-            tmp_file = DATA_FILE + ".tmp"
-            with open(tmp_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-                f.flush()
-                os.fsync(f.fileno())  # 确保数据写入物理磁盘
-            
-            # 原子替换原文件
-            os.replace(tmp_file, DATA_FILE)
+            # 使用临时文件进行原子写入；data.json 仅供程序读取，不做缩进以减少编码开销与文件体积
+            _write_atomic(DATA_FILE, dumps_bytes(data))
         except Exception as e:
+            _meta_dirty = True
             print(f"保存数据失败: {e}")
 
 
+def _flush_loop():
+    """后台落盘线程：收到保存请求后等待一个合并窗口，再统一写一次磁盘"""
+    while True:
+        _dirty.wait()
+        time.sleep(SAVE_DEBOUNCE_SECONDS)
+        # 先清除标记再保存，保存期间的新修改会触发下一轮
+        _dirty.clear()
+        save_data()
+
+
+def flush_pending():
+    """立即写入尚未落盘的修改（进程退出时调用）"""
+    if _dirty.is_set():
+        _dirty.clear()
+        save_data()
+
+
+def schedule_save(meta=True):
+    """
+    标记数据已修改，由后台线程在 SAVE_DEBOUNCE_SECONDS 内合并落盘
+    首次调用时启动落盘线程并注册退出时的兜底保存
+    
+    Args:
+        meta: 是否修改了金价历史以外的数据；仅追加金价时传 False，避免重写 data.json
+    """
+    global _flusher_started, _meta_dirty
+    if meta:
+        _meta_dirty = True
+    if not _flusher_started:
+        with _flusher_lock:
+            if not _flusher_started:
+                threading.Thread(target=_flush_loop, name='save-flusher', daemon=True).start()
+                atexit.register(flush_pending)
+                _flusher_started = True
+    _dirty.set()
+
+
 def _migrate_old_data_file():
     """
     自动迁移旧版本数据文件到新位置
@@ -85,71 +228,127 @@ def _migrate_old_data_file():
     if os.path.exists(DATA_FILE):
         return
     
-    # 如果旧路径存在，执行迁移
-    if os.path.exists(OLD_DATA_FILE):
+    # 旧路径存在时执行迁移，不存在时 move 直接抛出 FileNotFoundError
+    try:
+        # 确保目标目录存在
+        os.makedirs(DATA_DIR, exist_ok=True)
+        # 移动文件
+        shutil.move(OLD_DATA_FILE, DATA_FILE)
+        print(f"[迁移] 数据文件已从 {OLD_DATA_FILE} 移动到 {DATA_FILE}")
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        print(f"[迁移] 数据文件迁移失败: {e}")
+        # 迁移失败时尝试复制
         try:
-            # 确保目标目录存在
-            os.makedirs(DATA_DIR, exist_ok=True)
-            # 移动文件
-            shutil.move(OLD_DATA_FILE, DATA_FILE)
-            print(f"[迁移] 数据文件已从 {OLD_DATA_FILE} 移动到 {DATA_FILE}")
-        except Exception as e:
-            print(f"[迁移] 数据文件迁移失败: {e}")
-            # 迁移失败时尝试复制
+            shutil.copy2(OLD_DATA_FILE, DATA_FILE)
+            print(f"[迁移] 数据文件已复制到 {DATA_FILE}（原文件保留）")
+        except Exception as e2:
+            print(f"[迁移] 数据文件复制也失败: {e2}")
+
+
+def _load_price_history_file():
+    """读取金价历史追加文件，跳过无法解析的行（如写入中断留下的不完整末行）"""
+    history = []
+    with open(PRICE_HISTORY_FILE, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
             try:
-                shutil.copy2(OLD_DATA_FILE, DATA_FILE)
-                print(f"[迁移] 数据文件已复制到 {DATA_FILE}（原文件保留）")
-            except Exception as e2:
-                print(f"[迁移] 数据文件复制也失败: {e2}")
+                history.append(loads(line))
+            except ValueError:
+                continue
+    return history
+
+
+def _apply_loaded_data(data):
+    """将 data.json 的内容替换到内存状态，逐个资源在各自的锁内替换，同一时刻只持有一把锁"""
+    with settings_lock:
+        # 加载手动记录
+        manual_records.clear()
+        manual_records.extend(data.get("manual_records", []))
+        records_json_cache["bytes"] = None
+        
+        # 加载预警配置
+        alert_settings.update(data.get("alert_settings", {}))
+    
+    with funds_lock:
+        # 加载自选基金
+        fund_watchlist.clear()
+        fund_watchlist.extend(data.get("fund_watchlist", []))
+        
+        # 加载基金重仓股内容缓存
+        fund_portfolios.clear()
+        fund_portfolios.update(data.get("fund_portfolios", {}))
+    
+    # 持仓按基金代码去重（同一代码保留最后一条，与索引一致），缺少代码的条目跳过
+    holdings_by_code = {}
+    for h in data.get("fund_holdings", []):
+        code = h.get('code') if isinstance(h, dict) else None
+        if not code:
+            print(f"[加载] 跳过缺少基金代码的持仓记录: {h}")
+            continue
+        holdings_by_code[code] = h
+    
+    with holdings_lock:
+        # 加载基金持仓
+        fund_holdings.clear()
+        fund_holdings.extend(holdings_by_code.values())
+        fund_holdings_by_code.clear()
+        fund_holdings_by_code.update(holdings_by_code)
 
 
 def load_data():
-    """从 JSON 文件加载数据"""
+    """
+    从 JSON 文件加载数据
+    金价历史优先读取 PRICE_HISTORY_FILE，不存在时兼容旧版 data.json 中的 price_history 字段；
+    首次保存时会整体重写历史文件并去掉 data.json 中的旧字段
+    """
     global manual_records, alert_settings, fund_watchlist, fund_holdings, fund_portfolios
     
     # 执行自动迁移检查
     _migrate_old_data_file()
     
-    if os.path.exists(DATA_FILE):
-        try:
-            with lock:
-                with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    # 加载手动记录
-                    loaded_records = data.get("manual_records", [])
-                    manual_records.clear()
-                    manual_records.extend(loaded_records)
-                    
-                    # 加载历史价格
-                    history = data.get("price_history", [])
-                    price_history.clear()
-                    price_history.extend(history)
-                    
-                    # 加载预警配置
-                    saved_alerts = data.get("alert_settings", {})
-                    alert_settings.update(saved_alerts)
-                    
-                    # 加载自选基金
-                    fund_watchlist.clear()
-                    fund_watchlist.extend(data.get("fund_watchlist", []))
-                    
-                    # 加载基金持仓
-                    fund_holdings.clear()
-                    fund_holdings.extend(data.get("fund_holdings", []))
-                    
-                    # 加载基金重仓股内容缓存
-                    fund_portfolios.clear()
-                    fund_portfolios.update(data.get("fund_portfolios", {}))
-                    
-                print(f"成功加载数据: {len(manual_records)} 条记录, {len(price_history)} 条历史, "
-                      f"{len(fund_watchlist)} 个自选基金, {len(fund_holdings)} 条持仓, "
-                      f"{len(fund_portfolios)} 个重仓股缓存")
-                
-                # 加载后立即执行清理，避免跨日数据在首次 save_data() 前可见
-                cleanup_expired_data()
-            
-        except Exception as e:
-            print(f"加载数据失败: {e}")
-    else:
+    # 读取与解析在锁外完成，锁内只做内存中的替换
+    data = None
+    try:
+        with open(DATA_FILE, 'rb') as f:
+            data = loads(f.read())
+    except FileNotFoundError:
         print(f"数据文件不存在: {DATA_FILE}，将使用默认空数据")
+    except Exception as e:
+        print(f"加载数据失败: {e}")
+    
+    # 金价历史独立读取：data.json 缺失或损坏时也要载入，否则首次保存会用空窗口覆盖历史文件
+    history = None
+    try:
+        history = _load_price_history_file()
+    except FileNotFoundError:
+        # 仅在历史文件不存在时兼容旧版 data.json 中的 price_history 字段
+        if data is not None:
+            history = data.get("price_history", [])
+    except Exception as e:
+        print(f"加载金价历史失败: {e}")
+    
+    if data is None and history is None:
+        return
+    
+    try:
+        if history is not None:
+            with price_lock:
+                # 加载历史价格
+                price_history.clear()
+                price_history.extend(history)
+        
+        if data is not None:
+            _apply_loaded_data(data)
+        
+        print(f"成功加载数据: {len(manual_records)} 条记录, {len(price_history)} 条历史, "
+              f"{len(fund_watchlist)} 个自选基金, {len(fund_holdings)} 条持仓, "
+              f"{len(fund_portfolios)} 个重仓股缓存")
+        
+        # 加载后立即执行清理，避免跨日数据在首次 save_data() 前可见
+        cleanup_expired_data()
+        
+    except Exception as e:
+        print(f"加载数据失败: {e}")
@@ -9,13 +9,43 @@ import time
 import json
 import os
 import random
-import requests
 from datetime import datetime, timedelta
 
 from app.config import (
     SGE_HOLIDAY_URL,
     SGE_HOLIDAY_CACHE_FILE,
     SGE_HOLIDAY_CACHE_TTL,
+    HOLIDAY_NAMES,
+)
+from app.services.http_client import create_session, decode_html
+
+
+# Precompiled patterns (module level, built once)
+_BLOCK_SPLIT_RE = re.compile(r'searchContList')
+_LINK_RE = re.compile(r'<a[^>]+href="([^"]*)"[^>]*>(.*?)</a>', re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_LIST_DATE_RE = re.compile(r'<p\s+class="fr"\s*>\s*(\d{4}-\d{2}-\d{2})')
+
+# Per-holiday section: text from "<name>：" up to the next numbered section.
+# Each name is searched from the top of the page on its own, so a "<name>："
+# mentioned inside an earlier section's text is still found.
+_SECTION_RES = {
+    name: re.compile(
+        rf'{name}[：:](.*?)(?=[一二三四五六七八九十]+[、.．]|$)',
+        re.DOTALL,
+    )
+    for name in HOLIDAY_NAMES
+}
+# Closure date range: X月X日...至...X月X日...休市
+_CLOSURE_RE = re.compile(
+    r'(\d{1,2})\s*月\s*(\d{1,2})\s*日'
+    r'[^至]*?至[^月]*?'
+    r'(\d{1,2})\s*月\s*(\d{1,2})\s*日'
+    r'[^休]*?休市',
+)
+# First trading day: the date immediately before "开市"
+_FIRST_TRADING_RE = re.compile(
+    r'(\d{1,2})\s*月\s*(\d{1,2})\s*日[^月]*?(?:起照常|恢复)?开市',
 )
 
 
@@ -31,6 +61,9 @@ class SgeHolidayCrawler:
         self.base_url = "https://www.sge.com.cn"
         self.cache_file = SGE_HOLIDAY_CACHE_FILE
         self._session = None
+        # Parsed cache file, reused until the file's mtime changes
+        self._cache_mem = None
+        self._cache_mtime = None
         self._ensure_cache_dir()
 
     # ------------------------------------------------------------------
@@ -39,15 +72,20 @@ class SgeHolidayCrawler:
 
     def _ensure_cache_dir(self):
         cache_dir = os.path.dirname(self.cache_file)
-        if cache_dir and not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
 
     def _load_cache(self):
-        if not os.path.exists(self.cache_file):
-            return None
         try:
+            mtime = os.stat(self.cache_file).st_mtime_ns
+            if mtime == self._cache_mtime:
+                return self._cache_mem
             with open(self.cache_file, "r", encoding="utf-8") as f:
-                return json.load(f)
+                self._cache_mem = json.load(f)
+            self._cache_mtime = mtime
+            return self._cache_mem
+        except FileNotFoundError:
+            return None
         except Exception as e:
             print(f"[SGE爬虫] 加载缓存失败: {e}")
             return None
@@ -58,9 +96,13 @@ class SgeHolidayCrawler:
             with open(temp, "w", encoding="utf-8") as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
             os.replace(temp, self.cache_file)
+            self._cache_mem = data
+            self._cache_mtime = os.stat(self.cache_file).st_mtime_ns
             return True
         except Exception as e:
             print(f"[SGE爬虫] 保存缓存失败: {e}")
+            # The in-memory copy may already be modified; reload from disk
+            self._cache_mtime = None
             return False
 
     def _is_cache_valid(self, cache_data, year):
@@ -79,9 +121,12 @@ class SgeHolidayCrawler:
     # ------------------------------------------------------------------
 
     def _get_session(self):
-        """Lazy-init a requests.Session with browser-like headers."""
+        """Lazy-init a pooled session with browser-like headers."""
         if self._session is None:
-            self._session = requests.Session()
+            # Pooled session; retries are handled by _fetch_url itself
+            self._session = create_session(
+                pool_connections=1, pool_maxsize=1, max_retries=0,
+            )
             self._session.headers.update({
                 "User-Agent": (
                     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -116,16 +161,8 @@ class SgeHolidayCrawler:
                     url, timeout=timeout, verify=False,
                 )
                 if resp.status_code == 200:
-                    # Handle common encoding problems
-                    content = resp.content
-                    try:
-                        text = content.decode("utf-8")
-                    except UnicodeDecodeError:
-                        try:
-                            text = content.decode("gbk")
-                        except UnicodeDecodeError:
-                            text = resp.text
-                    return text
+                    # Decode once using the declared charset when present
+                    return decode_html(resp)
                 else:
                     print(
                         f"[SGE爬虫] HTTP {resp.status_code} "
@@ -161,30 +198,24 @@ class SgeHolidayCrawler:
         # Pattern: find <a> tags whose inner text (after stripping tags)
         #          contains "休市"
         # Each search result block: <div class="searchContList ...">
-        blocks = re.split(r'searchContList', html)
+        blocks = _BLOCK_SPLIT_RE.split(html)
 
         for block in blocks[1:]:  # skip the first split (before first match)
             # Extract href from <a> tag
-            href_match = re.search(
-                r'<a[^>]+href="([^"]*)"[^>]*>(.*?)</a>',
-                block, re.DOTALL,
-            )
+            href_match = _LINK_RE.search(block)
             if not href_match:
                 continue
 
             href = href_match.group(1).strip()
             raw_title = href_match.group(2).strip()
             # Strip all HTML tags from title
-            title = re.sub(r'<[^>]+>', '', raw_title).strip()
+            title = _TAG_RE.sub('', raw_title).strip()
 
             if "休市" not in title:
                 continue
 
             # Extract date from <p class="fr">
-            date_match = re.search(
-                r'<p\s+class="fr"\s*>\s*(\d{4}-\d{2}-\d{2})',
-                block,
-            )
+            date_match = _LIST_DATE_RE.search(block)
             date_str = date_match.group(1) if date_match else ""
 
             full_url = (
@@ -218,36 +249,21 @@ class SgeHolidayCrawler:
         holidays = {}
         first_trading_days = {}
 
-        holiday_names = [
-            "元旦", "春节", "清明节", "劳动节",
-            "端午节", "中秋节", "国庆节",
-        ]
-
         # Strategy A – named sections like "一、春节：..."
-        for name in holiday_names:
+        for name, section_pat in _SECTION_RES.items():
             # Step 1: Find the section for this holiday
             # SGE format: "一、元旦：...二、春节：..." or with HTML tags
             # Extract text from this holiday name to the next numbered section
-            section_pat = re.compile(
-                rf'{name}[：:](.*?)(?=[一二三四五六七八九十]+[、.．]|$)',
-                re.DOTALL,
-            )
             section_m = section_pat.search(html)
             if not section_m:
                 continue
 
             section_text = section_m.group(1)
             # Strip HTML tags for cleaner matching
-            clean_text = re.sub(r'<[^>]+>', '', section_text)
+            clean_text = _TAG_RE.sub('', section_text)
 
             # Step 2: Find closure date range (X月X日至X月X日休市)
-            closure_pat = re.compile(
-                r'(\d{1,2})\s*月\s*(\d{1,2})\s*日'
-                r'[^至]*?至[^月]*?'
-                r'(\d{1,2})\s*月\s*(\d{1,2})\s*日'
-                r'[^休]*?休市',
-            )
-            closure_m = closure_pat.search(clean_text)
+            closure_m = _CLOSURE_RE.search(clean_text)
             if not closure_m:
                 continue
 
@@ -259,10 +275,7 @@ class SgeHolidayCrawler:
 
             # Step 3: Find first trading day – the date immediately
             #         before "开市" (e.g. "1月5日（星期一）起照常开市")
-            ft_pat = re.compile(
-                r'(\d{1,2})\s*月\s*(\d{1,2})\s*日[^月]*?(?:起照常|恢复)?开市',
-            )
-            ft_m = ft_pat.search(clean_text)
+            ft_m = _FIRST_TRADING_RE.search(clean_text)
             if ft_m:
                 ftm, ftd = int(ft_m.group(1)), int(ft_m.group(2))
                 first_trading_days[name] = (
@@ -271,13 +284,7 @@ class SgeHolidayCrawler:
 
         # Strategy B – fallback: unnamed date ranges
         if not holidays:
-            pat = re.compile(
-                r'(\d{1,2})\s*月\s*(\d{1,2})\s*日'
-                r'[^至]*?至[^月]*?'
-                r'(\d{1,2})\s*月\s*(\d{1,2})\s*日'
-                r'[^休]*?休市'
-            )
-            for m in pat.finditer(html):
+            for m in _CLOSURE_RE.finditer(html):
                 sm, sd = int(m.group(1)), int(m.group(2))
                 em, ed = int(m.group(3)), int(m.group(4))
                 name = self._guess_holiday_name(sm, sd)
@@ -5,7 +5,9 @@
 """
 
 import time
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, time as dtime
+
+from app.utils.time_utils import format_date
 from app.services.holiday_service import (
     get_holidays,
     is_holiday as holiday_service_is_holiday,
@@ -14,6 +16,21 @@ from app.services.holiday_service import (
 )
 
 
+# 交易时段关键时间点（模块加载时构建一次，避免每次判断都解析时间字符串）
+_T0230 = dtime(2, 30)
+_T0850 = dtime(8, 50)
+_T0859 = dtime(8, 59)
+_T0900 = dtime(9, 0)
+_T0930 = dtime(9, 30)
+_T1130 = dtime(11, 30)
+_T1300 = dtime(13, 0)
+_T1500 = dtime(15, 0)
+_T1530 = dtime(15, 30)
+_T1950 = dtime(19, 50)
+_T1959 = dtime(19, 59)
+_T2000 = dtime(20, 0)
+
+
 def fetch_holidays(year=None):
     """
     获取中国法定节假日列表（委托给 holiday_service）
@@ -102,7 +119,7 @@ def get_trading_status(dt=None):
     holiday_name = None
     if holiday:
         from app.services.exchange_calendar import get_holiday_name_by_date as get_gold_holiday_name_by_date
-        holiday_name = get_gold_holiday_name_by_date(dt.strftime("%Y-%m-%d"))
+        holiday_name = get_gold_holiday_name_by_date(format_date(dt))
     
     result = {
         "is_trading_time": False,
@@ -119,7 +136,7 @@ def get_trading_status(dt=None):
     # 如果不是交易日，计算下次开盘时间
     if not is_trading_day(dt, "gold"):
         next_trading_day = _find_next_trading_day(dt, "gold")
-        day_open = datetime.combine(next_trading_day, datetime.strptime("09:00", "%H:%M").time())
+        day_open = datetime.combine(next_trading_day, _T0900)
         
         result["next_event"] = "day_open"
         result["next_event_time"] = day_open
@@ -128,38 +145,38 @@ def get_trading_status(dt=None):
     
     # 判断当前交易阶段
     # 早市集合竞价: 08:50-08:59
-    if current_time >= datetime.strptime("08:50", "%H:%M").time() and \
-       current_time < datetime.strptime("08:59", "%H:%M").time():
+    if current_time >= _T0850 and \
+       current_time < _T0859:
         result["is_trading_time"] = True
         result["trading_phase"] = "day_auction"
         result["phase_name"] = "早市集合竞价"
         result["next_event"] = "day_open"
-        day_open = datetime.combine(dt.date(), datetime.strptime("09:00", "%H:%M").time())
+        day_open = datetime.combine(dt.date(), _T0900)
         result["next_event_time"] = day_open
         result["time_until_next"] = int((day_open - dt).total_seconds())
         return result
     
     # 日间交易: 09:00-15:30
-    if current_time >= datetime.strptime("09:00", "%H:%M").time() and \
-       current_time < datetime.strptime("15:30", "%H:%M").time():
+    if current_time >= _T0900 and \
+       current_time < _T1530:
         result["is_trading_time"] = True
         result["trading_phase"] = "day_session"
         result["phase_name"] = "日间交易"
         result["next_event"] = "day_close"
-        day_close = datetime.combine(dt.date(), datetime.strptime("15:30", "%H:%M").time())
+        day_close = datetime.combine(dt.date(), _T1530)
         result["next_event_time"] = day_close
         result["time_until_next"] = int((day_close - dt).total_seconds())
         return result
     
     # 夜市集合竞价: 19:50-19:59 (仅周一至周四)
     if weekday < 4 and \
-       current_time >= datetime.strptime("19:50", "%H:%M").time() and \
-       current_time < datetime.strptime("19:59", "%H:%M").time():
+       current_time >= _T1950 and \
+       current_time < _T1959:
         result["is_trading_time"] = True
         result["trading_phase"] = "night_auction"
         result["phase_name"] = "夜市集合竞价"
         result["next_event"] = "night_open"
-        night_open = datetime.combine(dt.date(), datetime.strptime("20:00", "%H:%M").time())
+        night_open = datetime.combine(dt.date(), _T2000)
         result["next_event_time"] = night_open
         result["time_until_next"] = int((night_open - dt).total_seconds())
         return result
@@ -168,20 +185,20 @@ def get_trading_status(dt=None):
     # 注意：周五没有夜市
     if weekday < 4:
         # 20:00-23:59:59
-        if current_time >= datetime.strptime("20:00", "%H:%M").time():
+        if current_time >= _T2000:
             result["is_trading_time"] = True
             result["trading_phase"] = "night_session"
             result["phase_name"] = "夜间交易"
             result["next_event"] = "night_close"
             # 次日 02:30
             next_day = dt.date() + timedelta(days=1)
-            night_close = datetime.combine(next_day, datetime.strptime("02:30", "%H:%M").time())
+            night_close = datetime.combine(next_day, _T0230)
             result["next_event_time"] = night_close
             result["time_until_next"] = int((night_close - dt).total_seconds())
             return result
     
     # 检查是否是凌晨的夜间交易 (02:30 前)
-    if current_time < datetime.strptime("02:30", "%H:%M").time():
+    if current_time < _T0230:
         # 检查昨天是否是周一至周四（有夜市）
         yesterday = dt.date() - timedelta(days=1)
         yesterday_weekday = yesterday.weekday()
@@ -191,7 +208,7 @@ def get_trading_status(dt=None):
             result["trading_phase"] = "night_session"
             result["phase_name"] = "夜间交易"
             result["next_event"] = "night_close"
-            night_close = datetime.combine(dt.date(), datetime.strptime("02:30", "%H:%M").time())
+            night_close = datetime.combine(dt.date(), _T0230)
             result["next_event_time"] = night_close
             result["time_until_next"] = int((night_close - dt).total_seconds())
             return result
@@ -220,7 +237,7 @@ def get_fund_trading_status(dt=None):
     holiday_name = None
     if holiday:
         from app.services.exchange_calendar_crawler import get_holiday_name_by_date as get_fund_holiday_name_by_date
-        holiday_name = get_fund_holiday_name_by_date(dt.strftime("%Y-%m-%d"))
+        holiday_name = get_fund_holiday_name_by_date(format_date(dt))
     
     result = {
         "is_trading_time": False,
@@ -234,16 +251,10 @@ def get_fund_trading_status(dt=None):
         "weekday": weekday
     }
     
-    # 定义关键时间点
-    t930 = datetime.strptime("09:30", "%H:%M").time()
-    t1130 = datetime.strptime("11:30", "%H:%M").time()
-    t1300 = datetime.strptime("13:00", "%H:%M").time()
-    t1500 = datetime.strptime("15:00", "%H:%M").time()
-    
     # 如果不是交易日，计算下次开盘时间
     if not is_trading_day(dt, "fund"):
         next_trading_day = _find_next_trading_day(dt, "fund")
-        day_open = datetime.combine(next_trading_day, t930)
+        day_open = datetime.combine(next_trading_day, _T0930)
         
         result["next_event"] = "market_open"
         result["next_event_time"] = day_open
@@ -251,17 +262,17 @@ def get_fund_trading_status(dt=None):
         return result
     
     # 判断当前交易阶段
-    if (current_time >= t930 and current_time < t1130) or \
-       (current_time >= t1300 and current_time < t1500):
+    if (current_time >= _T0930 and current_time < _T1130) or \
+       (current_time >= _T1300 and current_time < _T1500):
         result["is_trading_time"] = True
         result["trading_phase"] = "trading"
         result["phase_name"] = "交易中"
         
-        if current_time < t1130:
-            next_event_time = datetime.combine(dt.date(), t1130)
+        if current_time < _T1130:
+            next_event_time = datetime.combine(dt.date(), _T1130)
             result["next_event"] = "lunch_break"
         else:
-            next_event_time = datetime.combine(dt.date(), t1500)
+            next_event_time = datetime.combine(dt.date(), _T1500)
             result["next_event"] = "market_close"
             
         result["next_event_time"] = next_event_time
@@ -269,15 +280,15 @@ def get_fund_trading_status(dt=None):
         return result
     
     # 非交易时间，计算下一个事件
-    if current_time < t930:
-        next_event_time = datetime.combine(dt.date(), t930)
+    if current_time < _T0930:
+        next_event_time = datetime.combine(dt.date(), _T0930)
         result["next_event"] = "market_open"
-    elif current_time < t1300:
-        next_event_time = datetime.combine(dt.date(), t1300)
+    elif current_time < _T1300:
+        next_event_time = datetime.combine(dt.date(), _T1300)
         result["next_event"] = "market_resume"
     else:
         next_trading_day = _find_next_trading_day(dt, "fund")
-        next_event_time = datetime.combine(next_trading_day, t930)
+        next_event_time = datetime.combine(next_trading_day, _T0930)
         result["next_event"] = "market_open"
         
     result["next_event_time"] = next_event_time
@@ -293,36 +304,36 @@ def _calculate_next_event(dt, result):
     weekday = get_weekday(dt)
     
     # 如果当前在日间交易前（08:50 前）
-    if current_time < datetime.strptime("08:50", "%H:%M").time():
+    if current_time < _T0850:
         result["next_event"] = "day_auction"
-        next_time = datetime.combine(dt.date(), datetime.strptime("08:50", "%H:%M").time())
+        next_time = datetime.combine(dt.date(), _T0850)
         result["next_event_time"] = next_time
         result["time_until_next"] = int((next_time - dt).total_seconds())
         return result
     
     # 如果当前在日间收盘后到夜市前
-    if current_time >= datetime.strptime("15:30", "%H:%M").time() and \
-       current_time < datetime.strptime("19:50", "%H:%M").time():
+    if current_time >= _T1530 and \
+       current_time < _T1950:
         # 检查今天是否有夜市（周一至周四）
         if weekday < 4:
             result["next_event"] = "night_auction"
-            next_time = datetime.combine(dt.date(), datetime.strptime("19:50", "%H:%M").time())
+            next_time = datetime.combine(dt.date(), _T1950)
             result["next_event_time"] = next_time
             result["time_until_next"] = int((next_time - dt).total_seconds())
         else:
             # 周五没有夜市，等下周一
             next_trading_day = _find_next_trading_day(dt, "gold")
             result["next_event"] = "day_open"
-            next_time = datetime.combine(next_trading_day, datetime.strptime("09:00", "%H:%M").time())
+            next_time = datetime.combine(next_trading_day, _T0900)
             result["next_event_time"] = next_time
             result["time_until_next"] = int((next_time - dt).total_seconds())
         return result
     
     # 如果当前在夜市收盘后（02:30 后到次日 08:50）
-    if current_time >= datetime.strptime("02:30", "%H:%M").time() and \
-       current_time < datetime.strptime("08:50", "%H:%M").time():
+    if current_time >= _T0230 and \
+       current_time < _T0850:
         result["next_event"] = "day_open"
-        next_time = datetime.combine(dt.date(), datetime.strptime("09:00", "%H:%M").time())
+        next_time = datetime.combine(dt.date(), _T0900)
         result["next_event_time"] = next_time
         result["time_until_next"] = int((next_time - dt).total_seconds())
         return result
@@ -330,7 +341,7 @@ def _calculate_next_event(dt, result):
     # 默认情况下找下一个交易日
     next_trading_day = _find_next_trading_day(dt, "gold")
     result["next_event"] = "day_open"
-    next_time = datetime.combine(next_trading_day, datetime.strptime("09:00", "%H:%M").time())
+    next_time = datetime.combine(next_trading_day, _T0900)
     result["next_event_time"] = next_time
     result["time_until_next"] = int((next_time - dt).total_seconds())
     
@@ -348,7 +359,7 @@ def _find_next_trading_day(start_dt, market_type="fund"):
     返回:
         date: 下一个交易日的日期
     """
-    date_str = start_dt.strftime("%Y-%m-%d")
+    date_str = format_date(start_dt)
     
     # 尝试直接获取节后首个交易日
     if market_type == "fund":
@@ -361,7 +372,7 @@ def _find_next_trading_day(start_dt, market_type="fund"):
             first_day_str = get_fund_first_trading_day(holiday_name, start_dt.year)
             if first_day_str:
                 try:
-                    candidate_date = datetime.strptime(first_day_str, "%Y-%m-%d").date()
+                    candidate_date = date.fromisoformat(first_day_str)
                     if candidate_date > start_dt.date():
                         return candidate_date
                 except Exception:
@@ -373,7 +384,7 @@ def _find_next_trading_day(start_dt, market_type="fund"):
             first_day_str = get_exchange_first_trading_day(holiday_name, start_dt.year)
             if first_day_str:
                 try:
-                    candidate_date = datetime.strptime(first_day_str, "%Y-%m-%d").date()
+                    candidate_date = date.fromisoformat(first_day_str)
                     if candidate_date > start_dt.date():
                         return candidate_date
                 except Exception:
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+节假日倒排索引
+将 {节日名称: [日期, ...]} 转为 {日期: 节日名称}，按源对象身份缓存，
+数据源返回同一对象时直接复用，重新加载（新对象）后自动重建
+"""
+
+import threading
+
+
+class DateNameIndex:
+    """按 key（如年份、数据来源）分槽缓存日期 -> 节日名称的索引"""
+
+    def __init__(self):
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, key, holidays, date_str):
+        """在 holidays 中查找 date_str 所属的节日名称，未找到返回 None"""
+        slot = self._slots.get(key)
+        # 槽内保存源对象引用，既用于身份比较，也保证其 id 不会被复用
+        if slot is None or slot[0] is not holidays:
+            index = {
+                date: name
+                for name, dates in holidays.items()
+                for date in dates
+            }
+            slot = (holidays, index)
+            with self._lock:
+                self._slots[key] = slot
+        return slot[1].get(date_str)
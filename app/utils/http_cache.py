@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 条件请求工具
+为轮询接口提供弱 ETag 校验，内容未变化时返回 304 省去响应体
+"""
+
+from flask import Response, request
+
+
+def etag_matches(etag):
+    """请求头 If-None-Match 是否命中给定的弱 ETag"""
+    return request.if_none_match.contains_weak(etag)
+
+
+def with_etag(response, etag):
+    """为响应附加弱 ETag，并要求浏览器每次使用缓存前先向服务端校验"""
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def not_modified(etag):
+    """构造 304 Not Modified 响应"""
+    return with_etag(Response(status=304), etag)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 编解码工具
+优先使用 orjson（直接输出 / 解析 UTF-8 bytes），未安装时回退到标准库 json
+"""
+
+import json
+
+from flask import Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_bytes(obj):
+    """将对象编码为紧凑的 UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """解析 JSON，data 可以是 bytes 或 str"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def ojsonify(obj):
+    """jsonify 的替代：直接以 bytes 构造 JSON 响应，省去 str -> bytes 的二次编码"""
+    return Response(dumps_bytes(obj), mimetype='application/json')
@@ -4,14 +4,118 @@
 基于2024年国务院修订的《全国年节及纪念日放假办法》
 """
 
-from datetime import datetime, timedelta
+import importlib.util
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
 from functools import lru_cache
 
-try:
-    from lunardate import LunarDate
-    LUNARDATE_AVAILABLE = True
-except ImportError:
-    LUNARDATE_AVAILABLE = False
+from app.utils.time_utils import format_date
+
+# lunardate 只在预生成表未覆盖的年份才需要，首次用到时再导入（见 _get_lunar）
+# 这里仅检查是否已安装，不执行导入
+LUNARDATE_AVAILABLE = importlib.util.find_spec("lunardate") is not None
+_lunar_date_cls = None
+
+
+def _get_lunar():
+    """按需导入 lunardate，返回 LunarDate 类；未安装时返回 False"""
+    global _lunar_date_cls
+    if _lunar_date_cls is None:
+        try:
+            from lunardate import LunarDate
+            _lunar_date_cls = LunarDate
+        except ImportError:
+            _lunar_date_cls = False
+    return _lunar_date_cls
+
+
+# 预先生成的农历节日公历日期表（由 lunardate 生成，覆盖 2020-2077 年）
+# 结构: 年份 -> ((除夕 月, 日), (端午 月, 日), (中秋 月, 日))
+# 表内年份直接查表，不再进行农历换算；表外年份才回退到 lunardate 实时计算
+_LUNAR_FESTIVALS = {
+    2020: ((1, 24), (6, 25), (10, 1)),
+    2021: ((2, 11), (6, 14), (9, 21)),
+    2022: ((1, 31), (6, 3), (9, 10)),
+    2023: ((1, 21), (6, 22), (9, 29)),
+    2024: ((2, 9), (6, 10), (9, 17)),
+    2025: ((1, 28), (5, 31), (10, 6)),
+    2026: ((2, 16), (6, 19), (9, 25)),
+    2027: ((2, 5), (6, 9), (9, 15)),
+    2028: ((1, 25), (5, 28), (10, 3)),
+    2029: ((2, 12), (6, 16), (9, 22)),
+    2030: ((2, 2), (6, 5), (9, 12)),
+    2031: ((1, 22), (6, 24), (10, 1)),
+    2032: ((2, 10), (6, 12), (9, 19)),
+    2033: ((1, 30), (6, 1), (9, 8)),
+    2034: ((2, 18), (6, 20), (9, 27)),
+    2035: ((2, 7), (6, 10), (9, 16)),
+    2036: ((1, 27), (5, 30), (10, 4)),
+    2037: ((2, 14), (6, 18), (9, 24)),
+    2038: ((2, 3), (6, 7), (9, 13)),
+    2039: ((1, 23), (5, 27), (10, 2)),
+    2040: ((2, 11), (6, 14), (9, 20)),
+    2041: ((1, 31), (6, 3), (9, 10)),
+    2042: ((1, 21), (6, 22), (9, 28)),
+    2043: ((2, 9), (6, 11), (9, 17)),
+    2044: ((1, 29), (5, 31), (10, 5)),
+    2045: ((2, 16), (6, 19), (9, 25)),
+    2046: ((2, 5), (6, 8), (9, 15)),
+    2047: ((1, 25), (5, 29), (10, 4)),
+    2048: ((2, 13), (6, 15), (9, 22)),
+    2049: ((2, 1), (6, 4), (9, 11)),
+    2050: ((1, 22), (6, 23), (9, 30)),
+    2051: ((2, 10), (6, 13), (9, 19)),
+    2052: ((1, 31), (6, 1), (9, 7)),
+    2053: ((2, 18), (6, 20), (9, 26)),
+    2054: ((2, 7), (6, 10), (9, 16)),
+    2055: ((1, 27), (5, 30), (10, 5)),
+    2056: ((2, 14), (6, 17), (9, 24)),
+    2057: ((2, 3), (6, 6), (9, 13)),
+    2058: ((1, 23), (6, 25), (10, 2)),
+    2059: ((2, 11), (6, 14), (9, 21)),
+    2060: ((2, 1), (6, 3), (9, 9)),
+    2061: ((1, 20), (6, 22), (9, 28)),
+    2062: ((2, 8), (6, 11), (9, 17)),
+    2063: ((1, 28), (6, 1), (10, 6)),
+    2064: ((2, 16), (6, 19), (9, 25)),
+    2065: ((2, 4), (6, 8), (9, 15)),
+    2066: ((1, 25), (5, 28), (10, 3)),
+    2067: ((2, 13), (6, 16), (9, 23)),
+    2068: ((2, 2), (6, 4), (9, 11)),
+    2069: ((1, 22), (6, 23), (9, 29)),
+    2070: ((2, 10), (6, 13), (9, 19)),
+    2071: ((1, 30), (6, 2), (9, 8)),
+    2072: ((2, 18), (6, 20), (9, 26)),
+    2073: ((2, 6), (6, 10), (9, 16)),
+    2074: ((1, 26), (5, 30), (10, 5)),
+    2075: ((2, 14), (6, 17), (9, 24)),
+    2076: ((2, 4), (6, 6), (9, 12)),
+    2077: ((1, 23), (6, 24), (10, 1)),
+}
+
+# 公历固定节假日（2024年新规）: (节日名, (月, 日), ...)
+_SOLAR_FIXED = (
+    ("元旦", (1, 1)),
+    ("劳动节", (5, 1), (5, 2)),
+    ("国庆节", (10, 1), (10, 2), (10, 3)),
+)
+
+# 清明节气（太阳黄经 15°，北京时间）所在的 4 月日期，1901-2099 年逐年一位
+# 由太阳视黄经低精度算法离线求得，导入时转为 bytes 按 year - 1901 索引
+_QINGMING_FIRST_YEAR = 1901
+_QINGMING_DAY = bytes(int(c) for c in (
+    "56655665566555655565"  # 1901-1920
+    "55655565556555655565"  # 1921-1940
+    "55655555555555555555"  # 1941-1960
+    "55555555555555545554"  # 1961-1980
+    "55545554555455545554"  # 1981-2000
+    "55545554455445544554"  # 2001-2020
+    "45544554455445544554"  # 2021-2040
+    "44544454445444544454"  # 2041-2060
+    "44544454445444444444"  # 2061-2080
+    "4444444444444444444"  # 2081-2099
+))
 
 
 def calculate_qingming_date(year):
@@ -19,9 +123,14 @@ def calculate_qingming_date(year):
     计算清明节日期
     清明节是春分后第15天，通常在4月4日或5日
     
-    算法：日期 = floor(年份后两位 * 0.2422 + C) - floor(年份后两位 / 4)
+    1901-2099 年直接查表；表外年份使用经验公式估算：
+    日期 = floor(年份后两位 * 0.2422 + C) - floor(年份后两位 / 4)
     其中 C = 4.81 (21世纪), 5.59 (20世纪)
     """
+    index = year - _QINGMING_FIRST_YEAR
+    if 0 <= index < len(_QINGMING_DAY):
+        return date(year, 4, _QINGMING_DAY[index])
+    
     year_mod = year % 100
     
     if year >= 2000:
@@ -35,32 +144,39 @@ def calculate_qingming_date(year):
     if day not in (4, 5):
         day = 4
     
-    return datetime(year, 4, day)
+    return date(year, 4, day)
 
 
+@lru_cache(maxsize=16)
 def calculate_spring_eve(year):
     """
-    计算农历除夕（春节前一天）
-    需要 lunardate 库支持
+    计算农历除夕（春节前一天），返回 date
+    优先查预生成表，表外年份需要 lunardate 库支持
     """
-    if not LUNARDATE_AVAILABLE:
-        # 回退：使用已知的2026-2030年春节日期估算
-        fallback_spring = {
-            2026: datetime(2026, 2, 16),
-            2027: datetime(2027, 2, 6),
-            2028: datetime(2028, 1, 26),
-            2029: datetime(2029, 2, 13),
-            2030: datetime(2030, 2, 3),
-        }
-        return fallback_spring.get(year, datetime(year, 2, 10))
+    festivals = _LUNAR_FESTIVALS.get(year)
+    if festivals:
+        month, day = festivals[0]
+        return date(year, month, day)
+    
+    LunarDate = _get_lunar()
+    if not LunarDate:
+        # 回退：表外年份且未安装 lunardate 时粗略估算
+        return date(year, 2, 10)
     
     # 农历正月初一
-    lunar_new_year = LunarDate(year, 1, 1).to_datetime()
+    lunar_new_year = LunarDate(year, 1, 1).toSolarDate()
     # 除夕 = 春节前一天
-    spring_eve = lunar_new_year - timedelta(days=1)
+    spring_eve = date.fromordinal(lunar_new_year.toordinal() - 1)
     return spring_eve
 
 
+def _spring_dates(spring_eve):
+    """春节假期：除夕至初三（4天），按序数逐日递增，不构造 timedelta"""
+    base = spring_eve.toordinal()
+    return tuple(date.fromordinal(base + i) for i in range(4))
+
+
+@lru_cache(maxsize=16)
 def calculate_lunar_holidays(year):
     """
     计算农历相关节假日
@@ -68,85 +184,49 @@ def calculate_lunar_holidays(year):
     春节：农历除夕、正月初一至初三（4天）
     端午节：农历五月初五
     中秋节：农历八月十五
+    
+    日期为 date 对象；结果按年份缓存，日期列表为 tuple，调用方如需修改返回的 dict 请先复制
     """
     holidays = {}
     
-    if not LUNARDATE_AVAILABLE:
-        # 使用备用数据（已知的准确农历日期）
-        fallback_lunar = {
-            2026: {
-                "spring_start": datetime(2026, 2, 16),  # 春节除夕
-                "duanwu": "2026-05-31",  # 端午节
-                "zhongqiu": "2026-10-25",  # 中秋节
-            },
-            2027: {
-                "spring_start": datetime(2027, 2, 6),  # 春节除夕
-                "duanwu": "2027-05-20",  # 端午节
-                "zhongqiu": "2027-10-14",  # 中秋节
-            },
-            2028: {
-                "spring_start": datetime(2028, 1, 26),  # 春节除夕
-                "duanwu": "2028-06-08",  # 端午节
-                "zhongqiu": "2028-10-02",  # 中秋节
-            },
-            2029: {
-                "spring_start": datetime(2029, 2, 13),  # 春节除夕
-                "duanwu": "2029-05-27",  # 端午节
-                "zhongqiu": "2029-09-21",  # 中秋节
-            },
-            2030: {
-                "spring_start": datetime(2030, 2, 2),  # 春节除夕
-                "duanwu": "2030-06-15",  # 端午节
-                "zhongqiu": "2030-10-10",  # 中秋节
-            },
-        }
-        
-        data = fallback_lunar.get(year, {})
-        
-        # 春节：除夕至初三（4天）
-        if "spring_start" in data:
-            spring_dates = [
-                (data["spring_start"] + timedelta(days=i)).strftime("%Y-%m-%d")
-                for i in range(4)
-            ]
-            holidays["春节"] = spring_dates
-        
-        # 端午节
-        if "duanwu" in data:
-            holidays["端午节"] = [data["duanwu"]]
-        
-        # 中秋节
-        if "zhongqiu" in data:
-            holidays["中秋节"] = [data["zhongqiu"]]
-    else:
-        # 春节
-        try:
-            spring_eve = calculate_spring_eve(year)
-            spring_dates = [
-                (spring_eve + timedelta(days=i)).strftime("%Y-%m-%d")
-                for i in range(4)  # 除夕至初三
-            ]
-            holidays["春节"] = spring_dates
-        except Exception:
-            pass
-        
-        # 端午节（农历五月初五）
-        try:
-            duanwu = LunarDate(year, 5, 5).to_datetime()
-            holidays["端午节"] = [duanwu.strftime("%Y-%m-%d")]
-        except Exception:
-            pass
-        
-        # 中秋节（农历八月十五）
-        try:
-            zhongqiu = LunarDate(year, 8, 15).to_datetime()
-            holidays["中秋节"] = [zhongqiu.strftime("%Y-%m-%d")]
-        except Exception:
-            pass
+    festivals = _LUNAR_FESTIVALS.get(year)
+    if festivals:
+        # 除夕统一由 calculate_spring_eve 给出（同样先查本表），春节日期只有一个来源
+        _, (dm, dd), (zm, zd) = festivals
+        holidays["春节"] = _spring_dates(calculate_spring_eve(year))
+        holidays["端午节"] = (date(year, dm, dd),)
+        holidays["中秋节"] = (date(year, zm, zd),)
+        return holidays
+    
+    LunarDate = _get_lunar()
+    if not LunarDate:
+        # 表外年份且未安装 lunardate，无法计算农历节日
+        return holidays
+    
+    # 春节
+    try:
+        holidays["春节"] = _spring_dates(calculate_spring_eve(year))
+    except Exception:
+        pass
+    
+    # 端午节（农历五月初五）
+    try:
+        duanwu = LunarDate(year, 5, 5).toSolarDate()
+        holidays["端午节"] = (duanwu,)
+    except Exception:
+        pass
+    
+    # 中秋节（农历八月十五）
+    try:
+        zhongqiu = LunarDate(year, 8, 15).toSolarDate()
+        holidays["中秋节"] = (zhongqiu,)
+    except Exception:
+        pass
     
     return holidays
 
 
+@lru_cache(maxsize=16)
 def calculate_solar_holidays(year):
     """
     计算公历固定节假日（2024年新规）
@@ -155,39 +235,18 @@ def calculate_solar_holidays(year):
     劳动节：5月1日-2日（2天）
     国庆节：10月1日-3日（3天）
     """
-    holidays = {}
-    
-    # 元旦
-    holidays["元旦"] = [f"{year}-01-01"]
-    
-    # 劳动节
-    holidays["劳动节"] = [f"{year}-05-01", f"{year}-05-02"]
-    
-    # 国庆节
-    holidays["国庆节"] = [f"{year}-10-0{i}" for i in range(1, 4)]
-    
-    return holidays
-
-
-def calculate_qingming_holidays(year):
-    """
-    计算清明节（节气）
-    """
-    holidays = {}
-    
-    try:
-        qingming = calculate_qingming_date(year)
-        holidays["清明节"] = [qingming.strftime("%Y-%m-%d")]
-    except Exception:
-        pass
-    
-    return holidays
+    return {
+        name: tuple(date(year, month, day) for month, day in days)
+        for name, *days in _SOLAR_FIXED
+    }
 
 
+@lru_cache(maxsize=16)
 def calculate_all_legal_holidays(year):
     """
     计算所有法定节假日（不含调休）
-    返回格式: {"节日名": [日期列表], ...}
+    返回格式: {"节日名": (date, ...), ...}
+    结果按年份缓存并在调用方之间共享，请勿原地修改
     """
     holidays = {}
     
@@ -197,24 +256,58 @@ def calculate_all_legal_holidays(year):
     # 农历节日
     holidays.update(calculate_lunar_holidays(year))
     
-    # 清明节
-    holidays.update(calculate_qingming_holidays(year))
+    # 清明节（节气，查表或公式，不会抛出异常）
+    holidays["清明节"] = (calculate_qingming_date(year),)
     
     return holidays
 
 
-def get_holidays_as_set(year):
+@lru_cache(maxsize=16)
+def get_holiday_dates(year):
     """
     获取年份的所有法定节假日日期集合
-    返回: set(["2026-01-01", "2026-02-16", ...])
+    返回: frozenset([date(2026, 1, 1), date(2026, 2, 16), ...])，按年份缓存
     """
     holidays = calculate_all_legal_holidays(year)
     
-    all_dates = set()
-    for dates in holidays.values():
-        all_dates.update(dates)
-    
-    return all_dates
+    return frozenset(
+        d for dates in holidays.values() for d in dates
+    )
+
+
+@lru_cache(maxsize=16)
+def _pack_year(year):
+    """
+    将年份的法定节假日压缩为整数位图：第 i 位为 1 表示该年第 i 天（1月1日为第 0 天）是节假日
+    返回: (1月1日的序数, 位图)
+    """
+    jan1 = date(year, 1, 1).toordinal()
+    packed = 0
+    for d in get_holiday_dates(year):
+        packed |= 1 << (d.toordinal() - jan1)
+    return jan1, packed
+
+
+@lru_cache(maxsize=16)
+def get_holidays_as_map(year):
+    """
+    获取年份的法定节假日 日期 -> 节日名称 映射
+    返回: {date(2026, 2, 16): "春节", ...}，按年份缓存，请勿原地修改
+    """
+    return {
+        d: name
+        for name, dates in calculate_all_legal_holidays(year).items()
+        for d in dates
+    }
+
+
+@lru_cache(maxsize=16)
+def get_holidays_as_set(year):
+    """
+    获取年份的所有法定节假日日期字符串集合（供与 API / 缓存文件中的字符串数据合并）
+    返回: frozenset(["2026-01-01", "2026-02-16", ...])，按年份缓存，需要修改时请先复制
+    """
+    return frozenset(format_date(d) for d in get_holiday_dates(year))
 
 
 def apply_adjustments(holidays_set, adjustments):
@@ -226,21 +319,14 @@ def apply_adjustments(holidays_set, adjustments):
         adjustments: 调休数据 {"workdays": [], "holidays": []}
     
     返回:
-        调整后的节假日集合
+        调整后的节假日集合（frozenset，不修改传入的集合）
     """
     if not adjustments:
         return holidays_set
     
-    result = set(holidays_set)
-    
-    # 移除调休上班日（原本是周末，现在要上班）
-    for date in adjustments.get("workdays", []):
-        result.discard(date)
-    
-    # 添加调休放假日（原本是工作日，现在放假）
-    result.update(adjustments.get("holidays", []))
-    
-    return result
+    # 移除调休上班日（原本是周末，现在要上班），再加入调休放假日（原本是工作日，现在放假）
+    return ((frozenset(holidays_set) - frozenset(adjustments.get("workdays", ())))
+            | frozenset(adjustments.get("holidays", ())))
 
 
 def get_next_holiday_info(current_date, holidays_set):
@@ -248,54 +334,100 @@ def get_next_holiday_info(current_date, holidays_set):
     获取下一个节假日信息
     
     参数:
-        current_date: 当前日期
-        holidays_set: 节假日集合
+        current_date: 当前日期（date 或 datetime）
+        holidays_set: 节假日 date 集合，如 get_holiday_dates(year)
     
     返回:
         (距离天数, 节日名称) 或 None
     """
-    holiday_dates = sorted([
-        (datetime.strptime(d, "%Y-%m-%d"), d) 
-        for d in holidays_set 
-        if d >= current_date.strftime("%Y-%m-%d")
-    ])
+    # date 之间直接比较，无需字符串解析
+    today = current_date.date() if isinstance(current_date, datetime) else current_date
+    next_date = min((d for d in holidays_set if d >= today), default=None)
     
-    if not holiday_dates:
+    if next_date is None:
         return None
     
-    next_date, date_str = holiday_dates[0]
-    days = (next_date - current_date).days
-    
-    # 推断节日名称
-    month = next_date.month
-    day = next_date.day
-    
-    if month == 1 and day == 1:
-        name = "元旦"
-    elif month == 2 and day in range(15, 20):
-        name = "春节"
-    elif month == 4 and day in (4, 5):
-        name = "清明节"
-    elif month == 5 and day in (1, 2):
-        name = "劳动节"
-    elif month == 5 and day in range(5, 10):
-        name = "端午节"
-    elif month == 9 or (month == 10 and day < 5):
-        name = "中秋节"
-    elif month == 10 and day in (1, 2, 3):
-        name = "国庆节"
-    else:
-        name = "假期"
+    days = (next_date - today).days
+    
+    # 按计算结果查节日名称；调休放假等不在法定节日内的日期统称"假期"
+    name = get_holidays_as_map(next_date.year).get(next_date, "假期")
     
     return (days, name)
 
 
+_TABLE_FIRST_YEAR = min(_LUNAR_FESTIVALS)
+_TABLE_LAST_YEAR = max(_LUNAR_FESTIVALS)
+_holiday_ordinals = None
+
+
+def _get_holiday_ordinals():
+    """预生成表覆盖年份内全部法定节假日的序数（升序 array），首次使用时生成"""
+    global _holiday_ordinals
+    if _holiday_ordinals is None:
+        _holiday_ordinals = array('l', sorted(
+            d.toordinal()
+            for year in range(_TABLE_FIRST_YEAR, _TABLE_LAST_YEAR + 1)
+            for d in get_holiday_dates(year)
+        ))
+    return _holiday_ordinals
+
+
+def get_holidays_in_range(start_date, end_date):
+    """
+    获取 [start_date, end_date] 区间内的法定节假日（可跨年）
+    合并各年份已缓存的 date 集合，不重复计算
+    
+    返回: frozenset([date, ...])
+    """
+    if isinstance(start_date, datetime):
+        start_date = start_date.date()
+    if isinstance(end_date, datetime):
+        end_date = end_date.date()
+    
+    # 区间完全落在预生成表内时（如多年回测），在有序序数数组上二分截取
+    if _TABLE_FIRST_YEAR <= start_date.year and end_date.year <= _TABLE_LAST_YEAR:
+        ordinals = _get_holiday_ordinals()
+        lo = bisect_left(ordinals, start_date.toordinal())
+        hi = bisect_right(ordinals, end_date.toordinal())
+        return frozenset(date.fromordinal(o) for o in ordinals[lo:hi])
+    
+    return frozenset(
+        d
+        for year in range(start_date.year, end_date.year + 1)
+        for d in get_holiday_dates(year)
+        if start_date <= d <= end_date
+    )
+
+
+def get_next_holiday(current_date):
+    """
+    获取从 current_date 起的下一个法定节假日
+    当年剩余日期中没有节假日时（如年末）再查下一年
+    
+    返回:
+        (距离天数, 节日名称) 或 None
+    """
+    today = current_date.date() if isinstance(current_date, datetime) else current_date
+    today_ordinal = today.toordinal()
+    
+    for year in (today.year, today.year + 1):
+        jan1, packed = _pack_year(year)
+        # 右移掉今天之前的天数，最低位的 1 即为下一个节假日距今天数
+        remaining = packed >> max(today_ordinal - jan1, 0)
+        if remaining:
+            days = (remaining & -remaining).bit_length() - 1 + max(jan1 - today_ordinal, 0)
+            next_date = date.fromordinal(today_ordinal + days)
+            return (days, get_holidays_as_map(year).get(next_date, "假期"))
+    
+    return None
+
+
 if __name__ == "__main__":
     # 测试
     print("=== 2026年法定节假日测试 ===")
     holidays = calculate_all_legal_holidays(2026)
     for name, dates in holidays.items():
-        print(f"{name}: {dates}")
+        print(f"{name}: {[format_date(d) for d in dates]}")
     
     print("\n=== 节假日集合 ===")
     all_dates = get_holidays_as_set(2026)
@@ -305,4 +437,4 @@ if __name__ == "__main__":
     print("\n=== 2027年测试 ===")
     holidays_2027 = calculate_all_legal_holidays(2027)
     for name, dates in holidays_2027.items():
-        print(f"{name}: {dates}")
+        print(f"{name}: {[format_date(d) for d in dates]}")
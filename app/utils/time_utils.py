@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+时间格式化工具
+基于 time.localtime() 的结构体直接拼接字符串，避开 datetime 对象构造与 strftime 的格式串解析
+"""
+
+
+def format_hms(lt):
+    """格式化为 HH:MM:SS"""
+    return f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}"
+
+
+def format_ymd(lt):
+    """格式化为 YYYY-MM-DD"""
+    return f"{lt.tm_year:04d}-{lt.tm_mon:02d}-{lt.tm_mday:02d}"
+
+
+def format_date(d):
+    """将 date / datetime 对象格式化为 YYYY-MM-DD（等价于 strftime("%Y-%m-%d")）"""
+    return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
+
+
+def format_ymd_hms(lt):
+    """格式化为 YYYY-MM-DD HH:MM:SS"""
+    return (f"{lt.tm_year:04d}-{lt.tm_mon:02d}-{lt.tm_mday:02d} "
+            f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}")
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+WSGI 入口
+供 waitress 等 WSGI 服务器加载，例如: waitress-serve --threads=8 --port=5000 wsgi:application
+注意：应用状态保存在进程内存中，只能以单进程方式运行
+"""
+
+from app import create_app
+from app.services.background import start_background_tasks
+
+application = create_app()
+start_background_tasks()